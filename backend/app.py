@@ -1,23 +1,26 @@
 import os
 import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity,verify_jwt_in_request
 from flask_bcrypt import Bcrypt
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ReturnDocument
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from dotenv import load_dotenv
 from datetime import datetime
 import logging
 import requests
+from collections import Counter
 from datetime import datetime
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pyotp
 import smtplib
-import joblib
 import sys
+import time
 import pandas as pd
 import numpy as np
-from sklearn.neighbors import NearestNeighbors
 import random
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash
@@ -25,12 +28,6 @@ from werkzeug.security import generate_password_hash
 
 print("✅ Flask is using Python:", sys.executable)
 
-try:
-    import sklearn
-    print("✅ scikit-learn is installed:", sklearn.__version__)
-except ImportError:
-    print("❌ ERROR: scikit-learn is NOT available in this environment!")
-
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")  
 NEWS_API_URL = "https://newsapi.org/v2/everything"
 
@@ -67,15 +64,35 @@ profiles_collection = db.profiles
 challenges_collection = db.challenges
 user_challenges_collection = db.user_challenges
 notifications_collection = db.notifications
+workout_plans_collection = db.workout_plans
+workout_history_collection = db.workout_history
+exercise_counts_collection = db.exercise_counts
+nutrition_daily_collection = db.nutrition_daily
+nutrition_totals_collection = db.nutrition_totals
+catalog_versions_collection = db.catalog_versions
 
 app.config["JWT_SECRET_KEY"]=os.getenv("JWT_SECRET_KEY")
 jwt = JWTManager(app)
 
 MODEL_PATH = os.path.join(os.getcwd(), "diet_kmeans.pkl")
+# numpy export of the KMeans centroids (`python diet_model.py`); serving it needs no scikit-learn
+CENTROIDS_PATH = os.path.join(os.getcwd(), "diet_centroids.npz")
+DIET_MODEL_PATH = CENTROIDS_PATH if os.path.exists(CENTROIDS_PATH) else MODEL_PATH
 
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from exercise_catalog import load_catalog
+from plan_cache import WorkoutPlanCache, iso_week
+from workout_plans import build_weekly_plan, plan_rng
+from food_catalog import load_food_table, FoodCatalog, NutrientNeighbors, FOOD_NUTRIENT_COLUMNS
+from catalog_manager import CatalogManager
+from model_registry import ModelRegistry, load_model
+from diet_model import CentroidModel
+from nutrition_rollups import NUTRITION_KEYS, record_meals, lifetime_totals
+from challenge_catalog import ChallengeCatalog
+from leaderboard import (
+    leaderboard_page, user_rank, load_board_rows, LeaderboardCache,
+    LEADERBOARD_LIMIT, LEADERBOARD_MAX_LIMIT, RANK_NEIGHBORS
+)
 from flask import jsonify
 from pymongo import MongoClient
 
@@ -195,40 +212,53 @@ def reset_password():
         return jsonify({'error': f"Error resetting password: {str(e)}"}), 500
 
 
-exercises_df = pd.read_csv('fitness_exercises.csv')  
-exercises_df['tags'] = exercises_df['bodyPart'] + ' ' + exercises_df['equipment'] + ' ' + exercises_df['target']
+EXERCISES_CSV = os.path.join(os.getcwd(), "fitness_exercises.csv")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(os.getcwd(), "artifacts"))
 
-tfidf = TfidfVectorizer(stop_words='english')
-tfidf_matrix = tfidf.fit_transform(exercises_df['tags'])
+# Per-worker cost of loading each catalog at import, reported by /api/metrics
+startup_timings = {}
 
-cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+started = time.perf_counter()
+# Built once per deploy by `python exercise_catalog.py build`; set EXERCISE_ARTIFACT_REBUILD=0
+# to refuse to start on a stale artifact instead of rebuilding it in the worker
+exercise_catalog = load_catalog(
+    EXERCISES_CSV,
+    ARTIFACT_DIR,
+    rebuild=os.getenv("EXERCISE_ARTIFACT_REBUILD", "1") == "1"
+)
+startup_timings["exercise_catalog_ms"] = round((time.perf_counter() - started) * 1000, 2)
 
-def get_intensity_level(bmi):
-    if bmi < 18.5: return 'beginner'
-    elif 18.5 <= bmi < 25: return 'intermediate'
-    elif 25 <= bmi < 30: return 'advanced'
-    else: return 'low-impact'
+workout_plan_cache = WorkoutPlanCache(int(os.getenv("WORKOUT_PLAN_CACHE_SIZE", 10000)))
 
-def format_gif_url(exercise_id):
-    try:
-        exercise_id = str(int(exercise_id)).zfill(4)  
-        return f"https://d205bpvrqc9yn1.cloudfront.net/{exercise_id}.gif"
-    except:
-        return None
+# Source files are re-checked at most this often; changed catalogs are rebuilt in the background
+catalogs = CatalogManager(check_interval=float(os.getenv("CATALOG_CHECK_INTERVAL", 30)))
+
+def install_exercise_catalog(catalog):
+    global exercise_catalog
+    exercise_catalog = catalog
+    # cached plans point at the old catalog's exercises
+    workout_plan_cache.clear()
+
+catalogs.register(
+    "exercises", [EXERCISES_CSV],
+    load=lambda: load_catalog(EXERCISES_CSV, ARTIFACT_DIR, rebuild=True),
+    install=install_exercise_catalog
+)
+
+@app.before_request
+def reload_changed_catalogs():
+    catalogs.poll()
 
 @app.route("/api/get-recommendations", methods=["GET"])
 @jwt_required()
 def get_recommendations():
     try:
-        if exercises_df.empty:
+        if exercise_catalog.empty:
             raise Exception("Exercise data not loaded")
             
-        general_recs = exercises_df.sample(n=6).copy()
-        general_recs['gifUrl'] = general_recs['id'].apply(format_gif_url)
-        
         return jsonify({
             "success": True,
-            "recommended_workouts": general_recs.replace({pd.NA: None}).to_dict('records')
+            "recommended_workouts": exercise_catalog.sample_records(6)
         }), 200
         
     except Exception as e:
@@ -241,10 +271,13 @@ def get_recommendations():
 @jwt_required()
 def get_personalized_workouts():
     try:
-        if exercises_df.empty or cosine_sim is None:
+        catalog = exercise_catalog
+        if catalog.empty:
             raise Exception("Exercise data not loaded")
         
         user_email = get_jwt_identity()
+        week = iso_week()
+
         user = profiles_collection.find_one({"email": user_email})
         
         if not user or "bmi" not in user:
@@ -253,79 +286,26 @@ def get_personalized_workouts():
                 "error": "BMI not found. Please update your profile."
             }), 400
 
-        bmi = user["bmi"]
-        intensity = get_intensity_level(bmi)
-        preferred_body_part = user.get("preferred_body_part", "all")
-        equipment_available = user.get("equipment", ["body weight"])
-        
-        filtered_exercises = exercises_df.copy()
-
-        if intensity == 'beginner':
-            filtered_exercises = filtered_exercises[~filtered_exercises['name'].str.contains('advanced|pro', case=False)]
-        elif intensity == 'low-impact':
-            filtered_exercises = filtered_exercises[filtered_exercises['equipment'].str.contains('body weight|resistance band', case=False)]
-        
-        if preferred_body_part != "all":
-            filtered_exercises = filtered_exercises[filtered_exercises['bodyPart'] == preferred_body_part]
+        profile_version = user.get("profile_version", 0)
 
-        filtered_exercises = filtered_exercises[filtered_exercises['equipment'].isin(equipment_available)]
+        # Filled in bulk by precompute_workout_plans.py; a plan built from an older
+        # profile (e.g. stored by a run that read the profile before an edit) is skipped
+        stored_plan = workout_plans_collection.find_one(
+            {"email": user_email, "week": week, "profile_version": profile_version}, {"_id": 0, "plan": 1}
+        )
+        if stored_plan:
+            return jsonify(stored_plan["plan"]), 200
 
-        arm_exercises = filtered_exercises[filtered_exercises['bodyPart'].str.lower().str.contains("arm")]
-        leg_exercises = filtered_exercises[filtered_exercises['bodyPart'].str.lower().str.contains("leg")]
+        cached_plan = workout_plan_cache.get(user_email, profile_version, week)
+        if cached_plan is not None:
+            return jsonify(cached_plan), 200
 
-        def get_weekly_plan(df, n=7):
-            if 'workout_history' in user:
-                try:
-                    history = pd.DataFrame(user['workout_history'])
-                    top_exercises = history['exerciseId'].value_counts().head(3).index.tolist()
-                    similar_exercises = set()
-
-                    for ex_id in top_exercises:
-                        idx = exercises_df[exercises_df['id'] == ex_id].index[0]
-                        sim_scores = list(enumerate(cosine_sim[idx]))
-                        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-                        similar_exercises.update([i[0] for i in sim_scores[1:4]])
-
-                    recommended_indices = list(similar_exercises)
-                    df = exercises_df.iloc[recommended_indices]
-                    df = df[df['bodyPart'].isin(["arms", "legs"])]
-                except:
-                    pass  
-
-            return df.sample(min(n, len(df))).copy()
-
-        weekly_arms = get_weekly_plan(arm_exercises)
-        weekly_legs = get_weekly_plan(leg_exercises)
-
-        weekly_arms['gifUrl'] = weekly_arms['id'].apply(format_gif_url)
-        weekly_legs['gifUrl'] = weekly_legs['id'].apply(format_gif_url)
-
-        arm_workouts = weekly_arms.replace({pd.NA: None}).to_dict('records')
-        leg_workouts = weekly_legs.replace({pd.NA: None}).to_dict('records')
-
-        weekly_plan = {
-            "monday": {"arms": arm_workouts[0] if len(arm_workouts) > 0 else None,
-                       "legs": leg_workouts[0] if len(leg_workouts) > 0 else None},
-            "tuesday": {"arms": arm_workouts[1] if len(arm_workouts) > 1 else None,
-                        "legs": leg_workouts[1] if len(leg_workouts) > 1 else None},
-            "wednesday": {"arms": arm_workouts[2] if len(arm_workouts) > 2 else None,
-                          "legs": leg_workouts[2] if len(leg_workouts) > 2 else None},
-            "thursday": {"arms": arm_workouts[3] if len(arm_workouts) > 3 else None,
-                         "legs": leg_workouts[3] if len(leg_workouts) > 3 else None},
-            "friday": {"arms": arm_workouts[4] if len(arm_workouts) > 4 else None,
-                       "legs": leg_workouts[4] if len(leg_workouts) > 4 else None},
-            "saturday": {"arms": arm_workouts[5] if len(arm_workouts) > 5 else None,
-                         "legs": leg_workouts[5] if len(leg_workouts) > 5 else None},
-            "sunday": {"arms": arm_workouts[6] if len(arm_workouts) > 6 else None,
-                       "legs": leg_workouts[6] if len(leg_workouts) > 6 else None},
-        }
+        response = build_weekly_plan(catalog, user, rng=plan_rng(user_email, profile_version, week))
+        if response["unknown_exercise_ids"]:
+            print(f"⚠ Workout history for {user_email} references unknown exercises: {response['unknown_exercise_ids']}")
+        workout_plan_cache.put(user_email, profile_version, week, response)
 
-        return jsonify({
-            "success": True,
-            "bmi": bmi,
-            "intensity_level": intensity,
-            "weekly_workout_plan": weekly_plan
-        }), 200
+        return jsonify(response), 200
 
     except Exception as e:
         return jsonify({
@@ -333,49 +313,121 @@ def get_personalized_workouts():
             "error": str(e)
         }), 500
 
+def invalidate_workout_plan(user_email):
+    """Drop the user's cached and precomputed plans after their plan inputs changed"""
+    workout_plan_cache.invalidate(user_email)
+    workout_plans_collection.delete_many({"email": user_email})
+
+@app.route("/api/log-workout", methods=["POST"])
+@jwt_required()
+def log_workout():
+    data = request.get_json(silent=True) or {}
+    user_email = get_jwt_identity()
+
+    exercise_ids = data.get("exercise_ids")
+    if exercise_ids is None and data.get("exerciseId") is not None:
+        exercise_ids = [data["exerciseId"]]
+    if not exercise_ids or not isinstance(exercise_ids, list):
+        return jsonify({"error": "exerciseId or exercise_ids is required"}), 400
+
+    positions, unknown_ids = exercise_catalog.lookup(exercise_ids)
+    if unknown_ids:
+        return jsonify({"error": "Unknown exercises", "unknown_exercise_ids": unknown_ids}), 400
+
+    now = datetime.utcnow()
+    completed = [int(exercise_catalog.records[pos]["id"]) for pos in positions]
+
+    # one bucket document per user and ISO week instead of an ever-growing profile array
+    history_query = {"email": user_email, "week": iso_week(now)}
+    history_update = {
+        "$push": {"entries": {"$each": [{"exerciseId": ex_id, "completed_at": now} for ex_id in completed]}},
+        "$inc": {"count": len(completed)}
+    }
+    try:
+        workout_history_collection.update_one(history_query, history_update, upsert=True)
+    except DuplicateKeyError:
+        # two first-of-the-week upserts raced; the other one inserted, so this one now updates
+        workout_history_collection.update_one(history_query, history_update, upsert=True)
+
+    count_ops = [
+        UpdateOne(
+            {"email": user_email, "exerciseId": ex_id},
+            {"$inc": {"count": times}, "$set": {"last_completed": now}},
+            upsert=True
+        )
+        for ex_id, times in Counter(completed).items()
+    ]
+    try:
+        exercise_counts_collection.bulk_write(count_ops, ordered=False)
+    except BulkWriteError as e:
+        # retry only the first-time upserts that lost a race; the other ops already applied
+        errors = e.details.get("writeErrors", [])
+        if not errors or any(error.get("code") != 11000 for error in errors):
+            raise
+        exercise_counts_collection.bulk_write([count_ops[error["index"]] for error in errors], ordered=False)
+
+    top_exercises = [
+        doc["exerciseId"] for doc in exercise_counts_collection.find(
+            {"email": user_email}, {"_id": 0, "exerciseId": 1}
+        ).sort([("count", -1), ("exerciseId", 1)]).limit(3)
+    ]
+
+    # the plan only depends on the top 3, so only a change there starts a new plan version
+    result = profiles_collection.update_one(
+        {"email": user_email, "top_exercises": {"$ne": top_exercises}},
+        {"$set": {"top_exercises": top_exercises}, "$inc": {"profile_version": 1}}
+    )
+    if result.modified_count:
+        invalidate_workout_plan(user_email)
+
+    return jsonify({
+        "message": "Workout logged successfully!",
+        "logged": len(completed),
+        "top_exercises": top_exercises
+    }), 201
+
+@app.route("/api/metrics", methods=["GET"])
+@jwt_required()
+def get_metrics():
+    return jsonify({
+        "startup_timings": startup_timings,
+        "workout_plan_cache": workout_plan_cache.stats(),
+        "catalogs": catalogs.status(),
+        "models": models.stats(),
+        "leaderboards": leaderboard_cache.stats(),
+        "challenges": challenge_catalog.status()
+    }), 200
+
 def load_food_data():
     try:
         file_path = os.path.join(os.getcwd(), "food_database.xlsx")
-        print(f"📂 Checking file at: {file_path}")  
         if not os.path.exists(file_path):
-            print("❌ File not found!")
+            print(f"❌ Food database not found at {file_path}")
             return {}
 
-        df = pd.read_excel(file_path, engine="openpyxl")
-        print("✅ First 5 rows of DataFrame:")
-        print(df.head())  
-        required_columns = ["Food Name", "Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]
-        for col in required_columns:
-            if col not in df.columns:
-                print(f"❌ Column '{col}' not found in Excel!")
-                return {}
-
-        
-        df = df.fillna(0)
-        numeric_columns = ["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]
-        df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-       
-        food_dict = df.set_index("Food Name")[numeric_columns].to_dict(orient="index")
+        started = time.perf_counter()
+        names, nutrients = load_food_table(file_path, ARTIFACT_DIR)
+        food_dict = {
+            name: dict(zip(FOOD_NUTRIENT_COLUMNS, row))
+            for name, row in zip(names.tolist(), nutrients.tolist())
+        }
 
-        print(f"✅ Loaded Food Items: {list(food_dict.keys())}") 
+        print(f"✅ Loaded {len(food_dict)} food items in {round((time.perf_counter() - started) * 1000, 2)} ms")
         return food_dict
 
     except Exception as e:
         print(f"⚠ Error loading food database: {e}")
         return {}
 
-food_database = load_food_data()
-    
 
-def initialize_model():
+def initialize_model(database):
     try:
-        if not food_database:
+        if not database:
             print("⚠ Food database not loaded - cannot initialize model")
             return None, None
         
         foods = []
-        for name, nutrients in food_database.items():
+        for name, nutrients in database.items():
             foods.append({
                 'name': name,
                 'calories': nutrients['Calories (kcal)'],
@@ -386,14 +438,53 @@ def initialize_model():
         
         food_df = pd.DataFrame(foods)
         features = food_df[['calories', 'protein', 'carbs', 'fat']]
-        model = NearestNeighbors(n_neighbors=5, algorithm='ball_tree')
+        model = NutrientNeighbors(n_neighbors=5)
         model.fit(features)
         return model, food_df
     except Exception as e:
         print(f"⚠ Error initializing model: {e}")
         return None, None
-    
-food_model, food_df = initialize_model()
+
+
+class FoodState:
+    """Everything built from food_database.xlsx, installed as one object.
+
+    A reload swaps the whole `food_state` in a single assignment, so a request
+    that reads it once never mixes the catalog of one spreadsheet with the
+    model of another.
+    """
+
+    def __init__(self, database, catalog, model, df):
+        self.database = database
+        self.catalog = catalog
+        self.model = model
+        self.df = df
+
+    @classmethod
+    def from_database(cls, database):
+        model, df = initialize_model(database)
+        return cls(database, FoodCatalog.from_dict(database), model, df)
+
+
+started = time.perf_counter()
+food_state = FoodState.from_database(load_food_data())
+startup_timings["food_database_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+def load_food_state():
+    database = load_food_data()
+    if not database:
+        raise RuntimeError("food_database.xlsx could not be loaded")
+    return FoodState.from_database(database)
+
+def install_food_state(state):
+    global food_state
+    food_state = state
+
+catalogs.register(
+    "foods", [os.path.join(os.getcwd(), "food_database.xlsx")],
+    load=load_food_state,
+    install=install_food_state
+)
 
 def calculate_calorie_needs(bmi, weight_kg, activity_level):
     base_calories = weight_kg * 22 
@@ -412,30 +503,41 @@ def calculate_calorie_needs(bmi, weight_kg, activity_level):
     else:
         return base_calories * activity_multiplier  
 
+# (plan key, share of daily calories) for every meal slot of a day, in output order
+MEAL_SLOTS = [('breakfast', 0.25), ('lunch', 0.35), ('dinner', 0.30), ('snacks', 0.05), ('snacks', 0.05)]
+NUTRIENT_COLUMNS = ['calories', 'protein', 'carbs', 'fat']
+
 def generate_meal_plan(bmi, daily_calories):
-    if not food_model or food_df.empty:
+    return generate_meal_plans([(bmi, daily_calories)])[0]
+
+def generate_meal_plans(users):
+    """Meal plans for many (bmi, daily_calories) pairs with a single kneighbors call"""
+    foods = food_state
+    if not foods.model or foods.df.empty:
         raise ValueError("Food database not initialized")
-    
-    macros = get_macros_by_bmi(bmi)
-    
-    
-    meals = {
-        'breakfast': generate_meal(daily_calories * 0.25, macros),
-        'lunch': generate_meal(daily_calories * 0.35, macros),
-        'dinner': generate_meal(daily_calories * 0.30, macros),
-        'snacks': [
-            generate_meal(daily_calories * 0.05, macros),
-            generate_meal(daily_calories * 0.05, macros)
-        ]
-    }
-    
-    meals['total_calories'] = sum(
-        meal['total_calories'] 
-        for meal in meals.values() 
-        if isinstance(meal, dict)
-    )
-    
-    return meals
+
+    shares = np.array([share for _, share in MEAL_SLOTS])
+    targets = np.vstack([
+        meal_targets(shares * daily_calories, get_macros_by_bmi(bmi))
+        for bmi, daily_calories in users
+    ])
+    meals, totals = generate_meals(targets, foods=foods)
+
+    slots = len(MEAL_SLOTS)
+    day_calories = totals[:, 0].reshape(len(users), slots).sum(axis=1)
+
+    plans = []
+    for u in range(len(users)):
+        plan = {'snacks': []}
+        for (key, _), meal in zip(MEAL_SLOTS, meals[u * slots:(u + 1) * slots]):
+            if key == 'snacks':
+                plan['snacks'].append(meal)
+            else:
+                plan[key] = meal
+        plan['total_calories'] = float(day_calories[u])
+        plans.append(plan)
+
+    return plans
 
 def get_macros_by_bmi(bmi):
     """Determine macronutrient ratios based on BMI"""
@@ -446,30 +548,51 @@ def get_macros_by_bmi(bmi):
     else: 
         return {'protein': 0.30, 'carbs': 0.45, 'fat': 0.25}
 
+def meal_targets(calories, macros):
+    """[calories, protein, carbs, fat] target rows for an array of meal calorie budgets"""
+    calories = np.atleast_1d(np.asarray(calories, dtype=float))
+    return np.column_stack([
+        calories,
+        calories * macros['protein'] / 4,
+        calories * macros['carbs'] / 4,
+        calories * macros['fat'] / 9
+    ])
+
 def generate_meal(calories, macros):
-    target_protein = calories * macros['protein'] / 4  
-    target_carbs = calories * macros['carbs'] / 4     
-    target_fat = calories * macros['fat'] / 9         
-    
-    target_vector = [calories, target_protein, target_carbs, target_fat]
-    distances, indices = food_model.kneighbors([target_vector])
-    
-    selected_indices = random.sample(list(indices[0]), min(3, len(indices[0])))
-    meal_foods = food_df.iloc[selected_indices].to_dict('records')
-    
-    return {
-        'foods': [{
-            'name': food['name'],
-            'calories': food['calories'],
-            'protein': food['protein'],
-            'carbs': food['carbs'],
-            'fat': food['fat']
-        } for food in meal_foods],
-        'total_calories': sum(f['calories'] for f in meal_foods),
-        'total_protein': sum(f['protein'] for f in meal_foods),
-        'total_carbs': sum(f['carbs'] for f in meal_foods),
-        'total_fat': sum(f['fat'] for f in meal_foods)
-    }
+    meals, _ = generate_meals(meal_targets(calories, macros))
+    return meals[0]
+
+def generate_meals(targets, foods_per_meal=3, foods=None):
+    """Answer a stack of target vectors with one kneighbors call.
+
+    Returns one meal dict per target row plus an (n, 4) array of meal totals.
+    `foods` is the FoodState to use (the current one by default).
+    """
+    foods = foods or food_state
+    _, indices = foods.model.kneighbors(pd.DataFrame(targets, columns=NUTRIENT_COLUMNS))
+
+    # choose foods_per_meal of each row's neighbours at random, without replacement
+    k = min(foods_per_meal, indices.shape[1])
+    order = np.random.random(indices.shape).argsort(axis=1)[:, :k]
+    picked = np.take_along_axis(indices, order, axis=1)
+
+    nutrients = foods.df[NUTRIENT_COLUMNS].to_numpy(dtype=float)
+    names = foods.df['name'].to_numpy()
+    totals = nutrients[picked].sum(axis=1)
+
+    meals = []
+    for row, total in zip(picked, totals.tolist()):
+        meals.append({
+            'foods': [
+                {'name': str(names[i]), **dict(zip(NUTRIENT_COLUMNS, nutrients[i].tolist()))}
+                for i in row
+            ],
+            'total_calories': total[0],
+            'total_protein': total[1],
+            'total_carbs': total[2],
+            'total_fat': total[3]
+        })
+    return meals, totals
 
 @app.route('/api/meal-plan', methods=['GET'])
 @jwt_required()
@@ -516,17 +639,71 @@ def adjust_calories_by_goal(base_calories, goal, bmi):
         return base_calories * 1.1  
     return base_calories 
 
-kmeans = None
+# plan per diet_kmeans cluster label; labels are only meaningful for the K they were written against
+DIET_PLANS = {
+    0: {
+        "goal": "Weight Gain",
+        "breakfast": "Avocado Toast & Eggs",
+        "lunch": "Chicken & Quinoa",
+        "dinner": "Salmon & Brown Rice",
+        "snacks": "Greek Yogurt with Nuts"
+    },
+    1: {
+        "goal": "Maintenance",
+        "breakfast": "Oats & Banana",
+        "lunch": "Grilled Chicken Salad",
+        "dinner": "Stir-fry Tofu with Rice",
+        "snacks": "Hummus with Carrots"
+    },
+    2: {
+        "goal": "Weight Loss",
+        "breakfast": "Scrambled Eggs with Spinach",
+        "lunch": "Grilled Fish & Veggies",
+        "dinner": "Vegetable Soup",
+        "snacks": "Almond Butter & Apple"
+    }
+}
+
+def diet_cluster_count(model):
+    return len(model.centroids) if isinstance(model, CentroidModel) else model.n_clusters
+
+def load_diet_model(path):
+    """load_model, refusing a model with cluster labels that have no entry in DIET_PLANS"""
+    model = load_model(path)
+    k = diet_cluster_count(model)
+    if k > len(DIET_PLANS):
+        raise ValueError(f"{os.path.basename(path)} has {k} clusters but there are only {len(DIET_PLANS)} diet plans")
+    return model
+
+def reload_diet_model():
+    """The redeployed artifact, refused if its K differs from the served model's (its labels would mean other plans)"""
+    entry = models.load("diet_kmeans", DIET_MODEL_PATH)
+    try:
+        active = models.get("diet_kmeans")
+    except LookupError:
+        return entry
+    if diet_cluster_count(entry.model) != diet_cluster_count(active.model):
+        raise ValueError(f"new diet model has {diet_cluster_count(entry.model)} clusters, "
+                         f"the served one {diet_cluster_count(active.model)}; restart to switch K")
+    return entry
+
+models = ModelRegistry(loader=load_diet_model)
 try:
-    if os.path.exists(MODEL_PATH):
-        print("🔍 Loading model from:", MODEL_PATH)
-        kmeans = joblib.load(MODEL_PATH)
-        print("✅ Model loaded successfully!")
+    if os.path.exists(DIET_MODEL_PATH):
+        print("🔍 Loading model from:", DIET_MODEL_PATH)
+        models.install(models.load("diet_kmeans", DIET_MODEL_PATH))
     else:
         print("❌ Model file not found!")
 except Exception as e:
     print(f"❌ ERROR: Model could not be loaded: {e}")
 
+# a redeployed model artifact is loaded in the background and swapped in between requests
+catalogs.register(
+    "diet_model", [DIET_MODEL_PATH],
+    load=reload_diet_model,
+    install=models.install
+)
+
 def calculate_bmi(weight_kg, height_cm):
     if height_cm <= 0 or weight_kg <= 0:
         return None, "Invalid input"
@@ -536,16 +713,12 @@ def calculate_bmi(weight_kg, height_cm):
     return bmi
 
 
-default_challenges = [
-    {"name": "🏃 10,000 Steps Daily", "description": "Walk 10,000 steps every day", "target": 10000, "unit": "steps"},
-    {"name": "💧 Drink 3L Water Daily", "description": "Drink at least 3 liters of water daily", "target": 3, "unit": "liters"},
-    {"name": "🏋️ Workout 5 Days a Week", "description": "Complete 5 workouts per week", "target": 5, "unit": "sessions"},
-    {"name": "🍎 Eat 5 Servings of Fruits/Veggies", "description": "Eat 5 servings of fruits/veggies daily", "target": 5, "unit": "servings"},
-    {"name": "🛌 Sleep 8 Hours Daily", "description": "Get at least 8 hours of sleep daily", "target": 8, "unit": "hours"}
-]
+challenge_catalog = ChallengeCatalog(
+    challenges_collection, catalog_versions_collection,
+    check_interval=float(os.getenv("CHALLENGE_CATALOG_CHECK_INTERVAL", 10))
+)
 
-if challenges_collection.count_documents({}) == 0:
-    challenges_collection.insert_many(default_challenges)
+# indexes and default challenges are applied by `python migrations.py migrate`, not at import
 
 @app.route("/",methods=["GET"])
 def home():
@@ -554,16 +727,6 @@ def home():
 @app.route("/api/recommend-diet", methods=["GET"])
 @jwt_required()
 def recommend_diet():
-    import sys
-    print(f"✅ Inside API: Flask is using Python: {sys.executable}")
-
-    try:
-        import sklearn
-        print(f"✅ scikit-learn is installed: {sklearn.__version__}")
-    except ImportError as e:
-        print(f"❌ ERROR: {e}")
-        return jsonify({"error": "Failed to recommend diet", "details": str(e)}), 500
-
     user_email = get_jwt_identity()
 
     try:
@@ -577,58 +740,27 @@ def recommend_diet():
         bmi = user["bmi"]
         print(f"✅ Retrieved BMI: {bmi}")
 
-        meals = list(meal_collection.find({"user": user_email}, {"_id": 0}))
-        if not meals:
+        totals = lifetime_totals(meal_collection, nutrition_totals_collection, user_email)
+        if not totals["meals"]:
             print("⚠ No meal data found for user.")
             return jsonify({"message": "No meal data available"}), 400
 
-        total_nutrition = {
-            "calories": sum(meal.get("nutrition", {}).get("calories", 0) for meal in meals),
-            "protein": sum(meal.get("nutrition", {}).get("protein", 0) for meal in meals),
-            "carbs": sum(meal.get("nutrition", {}).get("carbs", 0) for meal in meals),
-            "fats": sum(meal.get("nutrition", {}).get("fats", 0) for meal in meals),
-        }
+        total_nutrition = {key: totals[key] for key in NUTRITION_KEYS}
         print(f"📊 Nutrition Summary: {total_nutrition}")
 
-        model_path = os.path.join(os.getcwd(), "diet_kmeans.pkl")
-        if not os.path.exists(model_path):
-            print(f"❌ Model file not found at {model_path}")
-            return jsonify({"error": "Diet model not available"}), 500
-
-        kmeans_model = joblib.load(model_path)
-        print("✅ Model loaded successfully!")
-
         user_data = [[bmi, 3, 4, 2, 2]]
         print(f"📊 Predicting cluster for input: {user_data}")
 
-        cluster = kmeans_model.predict(user_data)[0]
-        print(f"✅ Predicted Cluster: {cluster}")
-
-        diet_plans = {
-            0: {
-                "goal": "Weight Gain",
-                "breakfast": "Avocado Toast & Eggs",
-                "lunch": "Chicken & Quinoa",
-                "dinner": "Salmon & Brown Rice",
-                "snacks": "Greek Yogurt with Nuts"
-            },
-            1: {
-                "goal": "Maintenance",
-                "breakfast": "Oats & Banana",
-                "lunch": "Grilled Chicken Salad",
-                "dinner": "Stir-fry Tofu with Rice",
-                "snacks": "Hummus with Carrots"
-            },
-            2: {
-                "goal": "Weight Loss",
-                "breakfast": "Scrambled Eggs with Spinach",
-                "lunch": "Grilled Fish & Veggies",
-                "dinner": "Vegetable Soup",
-                "snacks": "Almond Butter & Apple"
-            }
-        }
+        try:
+            clusters, model_version = models.predict("diet_kmeans", user_data)
+        except LookupError:
+            print(f"❌ Diet model not loaded from {DIET_MODEL_PATH}")
+            return jsonify({"error": "Diet model not available"}), 500
+
+        cluster = int(clusters[0])
+        print(f"✅ Predicted Cluster: {cluster} (model {model_version})")
 
-        recommended_diet = diet_plans.get(cluster, {"goal": "Balanced Diet", "breakfast": "Smoothie", "lunch": "Quinoa Salad", "dinner": "Grilled Fish"})
+        recommended_diet = DIET_PLANS.get(cluster, {"goal": "Balanced Diet", "breakfast": "Smoothie", "lunch": "Quinoa Salad", "dinner": "Grilled Fish"})
         
         return jsonify({
             "bmi": bmi,
@@ -644,8 +776,7 @@ def recommend_diet():
 @app.route("/api/get-challenges", methods=["GET"])
 @jwt_required()
 def get_challenges():
-    challenges = list(challenges_collection.find({}, {"_id": 0}))
-    return jsonify({"challenges": challenges}), 200
+    return jsonify({"challenges": challenge_catalog.all()}), 200
 
 @app.route("/api/news", methods=["GET"])
 def get_news():
@@ -678,6 +809,14 @@ def get_news():
     except requests.exceptions.RequestException as e:
         return jsonify({"error": str(e)}), 500
 
+# Views are served by the indexed leaderboard_page/user_rank queries by default. With
+# LEADERBOARD_CACHE_MAX_AGE > 0 each worker keeps sorted boards instead, and other
+# workers' writes show up once a board older than that is rebuilt in the background.
+leaderboard_cache = LeaderboardCache(
+    lambda challenge_name: load_board_rows(user_challenges_collection, challenge_name),
+    max_age=float(os.getenv("LEADERBOARD_CACHE_MAX_AGE", 0))
+)
+
 @app.route("/api/join-challenge", methods=["POST"])
 @jwt_required()
 def join_challenge():
@@ -688,7 +827,7 @@ def join_challenge():
     if not challenge_name:
         return jsonify({"error": "Challenge name is required"}), 400
 
-    challenge = challenges_collection.find_one({"name": challenge_name})
+    challenge = challenge_catalog.get(challenge_name)
     if not challenge:
         return jsonify({"error": "Challenge not found"}), 404
 
@@ -704,12 +843,56 @@ def join_challenge():
         "unit": challenge["unit"],
         "joined_at": datetime.utcnow()
     })
+    if leaderboard_cache.has(challenge_name):
+        user = users_collection.find_one({"email": user_email}, {"_id": 0, "username": 1}) or {}
+        leaderboard_cache.add(challenge_name, user_email, 0, user.get("username"))
 
     return jsonify({"message": f"Joined challenge: {challenge_name}"}), 201
 
+CHALLENGE_BATCH_LIMIT = 50
+
+def valid_progress(progress):
+    return isinstance(progress, (int, float)) and not isinstance(progress, bool)
+
+def award_completions(user_email, entries):
+    """Mark entries that reached their target completed and badge them; returns the newly completed names.
+
+    The completed flag is flipped with a conditional update, so when concurrent
+    increments cross the target together only one of them awards the badge.
+    """
+    newly_completed = []
+    for entry in entries:
+        target = entry.get("target")
+        if target is None:
+            challenge = challenge_catalog.get(entry["challenge_name"])
+            target = challenge["target"] if challenge else None
+        if entry.get("completed") or target is None or entry["progress"] < target:
+            continue
+        result = user_challenges_collection.update_one(
+            {"email": user_email, "challenge_name": entry["challenge_name"], "completed": {"$ne": True}},
+            {"$set": {"completed": True}}
+        )
+        if result.modified_count:
+            newly_completed.append(entry["challenge_name"])
+
+    if newly_completed:
+        achievements_collection.insert_many([
+            {
+                "user": user_email,
+                "title": f"🏆 {name} Champion",
+                "description": f"Congratulations! You completed the '{name}' challenge and earned the 🏆 {name} Champion badge!",
+                "likes": 0,
+                "comments": [],
+                "date": datetime.utcnow().strftime("%Y-%m-%d")
+            }
+            for name in newly_completed
+        ])
+    return newly_completed
+
 @app.route("/api/update-challenge-progress", methods=["POST"])
 @jwt_required()
 def update_challenge_progress():
+    """Add `progress` to the caller's entry with one atomic $inc"""
     data = request.json
     user_email = get_jwt_identity()
     challenge_name = data.get("challenge_name")
@@ -717,43 +900,74 @@ def update_challenge_progress():
 
     if not challenge_name or progress is None:
         return jsonify({"error": "Challenge name and progress are required"}), 400
+    if not valid_progress(progress):
+        return jsonify({"error": "Progress must be a number"}), 400
 
-    challenge = challenges_collection.find_one({"name": challenge_name})
-    if not challenge:
-        return jsonify({"error": "Challenge not found"}), 404
-
-    user_progress = user_challenges_collection.find_one({"email": user_email, "challenge_name": challenge_name})
-    if not user_progress:
-        return jsonify({"error": "You have not joined this challenge"}), 403
-
-    new_progress = user_progress["progress"] + progress
-    is_completed = new_progress >= challenge["target"]
-
-    user_challenges_collection.update_one(
+    entry = user_challenges_collection.find_one_and_update(
         {"email": user_email, "challenge_name": challenge_name},
-        {"$set": {"progress": new_progress, "completed": is_completed}}
+        {"$inc": {"progress": progress}},
+        projection={"_id": 0, "challenge_name": 1, "progress": 1, "target": 1, "completed": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if entry is None:
+        if not challenge_catalog.get(challenge_name):
+            return jsonify({"error": "Challenge not found"}), 404
+        return jsonify({"error": "You have not joined this challenge"}), 403
 
-    if is_completed:
-        badge_title = f"🏆 {challenge_name} Champion"
-        badge_description = f"Congratulations! You completed the '{challenge_name}' challenge and earned the {badge_title} badge!"
-
-        achievements_collection.insert_one({
-            "user": user_email,
-            "title": badge_title,
-            "description": badge_description,
-            "likes": 0,
-            "comments": [],
-            "date": datetime.utcnow().strftime("%Y-%m-%d")
-        })
+    new_progress = entry["progress"]
+    leaderboard_cache.set_progress(challenge_name, user_email, new_progress)
 
+    if award_completions(user_email, [entry]):
         return jsonify({
             "message": f"Congratulations! You completed '{challenge_name}' 🎉",
-            "badge": badge_title
+            "badge": f"🏆 {challenge_name} Champion",
+            "new_progress": new_progress
         }), 200
 
     return jsonify({"message": "Progress updated successfully!", "new_progress": new_progress}), 200
 
+@app.route("/api/update-challenges-progress", methods=["POST"])
+@jwt_required()
+def update_challenges_progress():
+    """Apply {"updates": [{"challenge_name", "progress"}, ...]} to several joined challenges in one bulk write"""
+    data = request.json
+    user_email = get_jwt_identity()
+
+    updates = data.get("updates") if isinstance(data, dict) else None
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "Invalid request, 'updates' must be a non-empty list"}), 400
+    if len(updates) > CHALLENGE_BATCH_LIMIT:
+        return jsonify({"error": f"At most {CHALLENGE_BATCH_LIMIT} updates per request"}), 400
+
+    increments = {}
+    for i, update in enumerate(updates):
+        if not isinstance(update, dict) or not update.get("challenge_name") or not valid_progress(update.get("progress")):
+            return jsonify({"error": f"Update {i} needs a challenge_name and a numeric progress"}), 400
+        name = update["challenge_name"]
+        increments[name] = increments.get(name, 0) + update["progress"]
+
+    user_challenges_collection.bulk_write([
+        UpdateOne({"email": user_email, "challenge_name": name}, {"$inc": {"progress": amount}})
+        for name, amount in increments.items()
+    ], ordered=False)
+
+    entries = list(user_challenges_collection.find(
+        {"email": user_email, "challenge_name": {"$in": list(increments)}},
+        {"_id": 0, "challenge_name": 1, "progress": 1, "target": 1, "completed": 1}
+    ))
+    for entry in entries:
+        leaderboard_cache.set_progress(entry["challenge_name"], user_email, entry["progress"])
+    completed = award_completions(user_email, entries)
+
+    updated = {entry["challenge_name"] for entry in entries}
+    return jsonify({
+        "message": f"Updated {len(updated)} challenges",
+        "progress": {entry["challenge_name"]: entry["progress"] for entry in entries},
+        "completed": completed,
+        "badges": [f"🏆 {name} Champion" for name in completed],
+        "not_joined": [name for name in increments if name not in updated]
+    }), 200
+
 
 @app.route("/api/reset-challenge-progress", methods=["POST"])
 @jwt_required()
@@ -771,6 +985,7 @@ def reset_challenge_progress():
     )
 
     if result.modified_count > 0:
+        leaderboard_cache.set_progress(challenge_name, user_email, 0)
         return jsonify({"message": f"Progress for '{challenge_name}' has been reset!"}), 200
 
     return jsonify({"error": "Challenge progress not found"}), 404
@@ -786,26 +1001,37 @@ def get_user_challenges():
 @app.route("/api/get-leaderboard/<challenge_name>", methods=["GET"])
 @jwt_required()
 def get_leaderboard(challenge_name):
+    """?limit=&offset= page of the leaderboard plus `me`: the caller's rank and ?neighbors= rows either side"""
     try:
-        leaderboard = list(user_challenges_collection.find(
-            {"challenge_name": challenge_name}, 
-            {"_id": 0, "email": 1, "progress": 1}
-        ))
-
-        if not leaderboard:
-            return jsonify({"message": "No entries found for this challenge", "leaderboard": []}), 200
-
-        leaderboard_sorted = sorted(leaderboard, key=lambda x: x["progress"], reverse=True)
+        limit = int(request.args.get("limit", LEADERBOARD_LIMIT))
+        offset = int(request.args.get("offset", 0))
+        neighbors = int(request.args.get("neighbors", RANK_NEIGHBORS))
+        if not 1 <= limit <= LEADERBOARD_MAX_LIMIT or offset < 0 or not 0 <= neighbors <= 10:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": f"limit must be 1-{LEADERBOARD_MAX_LIMIT}, offset >= 0 and neighbors 0-10"}), 400
 
-        for entry in leaderboard_sorted:
-            user = users_collection.find_one(
-                {"email": entry["email"]}, 
-                {"_id": 0, "username": 1}
+    try:
+        if leaderboard_cache.max_age > 0:
+            leaderboard, has_more, me, age = leaderboard_cache.query(
+                challenge_name, get_jwt_identity(), limit, offset, neighbors
             )
-            entry["username"] = user.get("username", entry["email"]) if user else entry["email"]
-            del entry["email"]
+        else:
+            leaderboard, has_more = leaderboard_page(user_challenges_collection, challenge_name, limit, offset)
+            me = user_rank(user_challenges_collection, challenge_name, get_jwt_identity(), neighbors)
+            age = 0
+
+        if not leaderboard and offset == 0:
+            return jsonify({"message": "No entries found for this challenge", "leaderboard": [], "me": me}), 200
 
-        return jsonify({"leaderboard": leaderboard_sorted}), 200
+        return jsonify({
+            "leaderboard": leaderboard,
+            "me": me,
+            "limit": limit,
+            "offset": offset,
+            "has_more": has_more,
+            "cache_age_seconds": age
+        }), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -823,6 +1049,7 @@ def leave_challenge():
     result = user_challenges_collection.delete_one({"email": user_email, "challenge_name": challenge_name})
 
     if result.deleted_count > 0:
+        leaderboard_cache.remove(challenge_name, user_email)
         return jsonify({"message": f"You have left the '{challenge_name}' challenge."}), 200
 
     return jsonify({"error": "Challenge not found or not joined."}), 404
@@ -840,7 +1067,7 @@ def add_challenge():
     if not all([challenge_name, description, target, unit]):
         return jsonify({"error": "All fields (name, description, target, unit) are required"}), 400
 
-    if challenges_collection.find_one({"name": challenge_name}):
+    if challenge_catalog.get(challenge_name):
         return jsonify({"error": "Challenge already exists"}), 400
 
     new_challenge = {
@@ -850,7 +1077,11 @@ def add_challenge():
         "unit": unit
     }
 
-    challenges_collection.insert_one(new_challenge)
+    try:
+        challenges_collection.insert_one(dict(new_challenge))
+    except DuplicateKeyError:
+        return jsonify({"error": "Challenge already exists"}), 400
+    challenge_catalog.bump()
 
     return jsonify({"message": "New challenge added!", "challenge": new_challenge}), 201
 
@@ -891,9 +1122,10 @@ def store_profile():
     }
     result = profiles_collection.update_one(
         {"email": user_email},
-        {"$set": profile_data},
+        {"$set": profile_data, "$inc": {"profile_version": 1}},
         upsert=True
     )
+    invalidate_workout_plan(user_email)
     
     return jsonify({
         "message": "Profile stored successfully",
@@ -947,7 +1179,8 @@ def edit_profile():
     if weight and height:
         update_data["bmi"] = calculate_bmi(weight, height)
 
-    profiles_collection.update_one({"email": user_email}, {"$set": update_data})
+    profiles_collection.update_one({"email": user_email}, {"$set": update_data, "$inc": {"profile_version": 1}})
+    invalidate_workout_plan(user_email)
 
     return jsonify({"message": "Profile updated successfully"}), 200
 
@@ -1046,37 +1279,28 @@ def get_current_date():
 @app.route("/api/update-steps", methods=["POST"])
 @jwt_required()
 def update_steps():
+    """Store today's step count with one upsert on the unique (email, date) index"""
     data = request.json
     user_email = get_jwt_identity()
     new_steps = data.get("steps")
-    current_date = datetime.utcnow().strftime("%Y-%m-%d")  
+    current_date = get_current_date()
 
     if new_steps is None:
         return jsonify({"error": "Steps value is required"}), 400
+    if not isinstance(new_steps, (int, float)) or isinstance(new_steps, bool) or new_steps < 0:
+        return jsonify({"error": "Steps must be a non-negative number"}), 400
 
-    if "steps" not in db.list_collection_names():
-        db.create_collection("steps")
-
-    last_entry = steps_collection.find_one({"email": user_email, "date": current_date})
-
-    if not last_entry:
-        steps_collection.insert_one({
-            "email": user_email,
-            "date": current_date,
-            "steps": new_steps,
-            "last_updated": datetime.utcnow()
-        })
-    else:
-        steps_collection.update_one(
-            {"email": user_email, "date": current_date},
-            {"$set": {"steps": new_steps, "last_updated": datetime.utcnow()}},
-            upsert=True
-        )
+    query = {"email": user_email, "date": current_date}
+    update = {"$set": {"steps": new_steps, "last_updated": datetime.utcnow()}}
+    try:
+        steps_collection.update_one(query, update, upsert=True)
+    except DuplicateKeyError:
+        # two first-of-the-day upserts raced; the other one inserted, so this one now updates
+        steps_collection.update_one(query, update, upsert=True)
 
     return jsonify({"message": "Steps updated successfully!", "date": current_date}), 200
 
 
-
 @app.route("/api/get-steps", methods=["GET"])
 @jwt_required()
 def get_steps():
@@ -1588,6 +1812,35 @@ logging.basicConfig(level=logging.DEBUG)
 
 from datetime import datetime
 
+MEAL_BATCH_LIMIT = 100
+
+
+def meal_food_names(meals):
+    names = []
+    for food_items in meals.values():
+        if not isinstance(food_items, list):
+            food_items = [food_items]
+        names.extend(food_items)
+    return names
+
+
+def build_meal_entries(user_email, entries):
+    """meals documents and per-entry unmatched names, with all totals from one nutrient gather"""
+    catalog = food_state.catalog
+    resolved = [catalog.resolve_many(meal_food_names(entry["meals"])) for entry in entries]
+    totals = catalog.totals([ids for ids, _ in resolved])
+
+    documents = []
+    for entry, row in zip(entries, totals):
+        documents.append({
+            "user": user_email,
+            "meals": entry["meals"],
+            "nutrition": dict(zip(NUTRITION_KEYS, (float(value) for value in row))),
+            "date": entry["date"]
+        })
+    return documents, [unmatched for _, unmatched in resolved]
+
+
 @app.route("/api/log-meal", methods=["POST"])
 @jwt_required()
 def log_meal():
@@ -1598,84 +1851,201 @@ def log_meal():
         return jsonify({"error": "Invalid request, 'meals' field is required"}), 400
 
     meals = data.get("meals")
+    if not isinstance(meals, dict):
+        return jsonify({"error": "'meals' must be an object of meal type to food items"}), 400
 
-   
-    global food_database
-    if not isinstance(food_database, dict) or not food_database:
+    if len(food_state.catalog) == 0:
         return jsonify({"error": "Food database not loaded properly"}), 500
 
-   
-    total_calories = 0
-    total_protein = 0
-    total_carbs = 0
-    total_fats = 0
-
-    
-    for meal_type, food_items in meals.items():
-        if not isinstance(food_items, list): 
-            food_items = [food_items] 
-        
-        for food_item in food_items:
-            if food_item in food_database:
-                food_info = food_database[food_item]
-                total_calories += food_info.get("Calories (kcal)", 0)
-                total_protein += food_info.get("Protein (g)", 0)
-                total_carbs += food_info.get("Carbohydrates (g)", 0)
-                total_fats += food_info.get("Fats (g)", 0)
-            else:
-                print(f"⚠ Warning: '{food_item}' not found in database!")
-
-    meal_entry = {
-        "user": user_email,
-        "meals": meals, 
-        "nutrition": {
-            "calories": total_calories,
-            "protein": total_protein,
-            "carbs": total_carbs,
-            "fats": total_fats,
-        },
-        "date": datetime.utcnow().isoformat()  
-    }
+    documents, unmatched = build_meal_entries(
+        user_email, [{"meals": meals, "date": datetime.utcnow().isoformat()}]
+    )
+    meal_entry = documents[0]
 
     meal_collection.insert_one(meal_entry)
+    record_meals(nutrition_daily_collection, nutrition_totals_collection, documents)
 
     return jsonify({
         "message": "Meal logged successfully!",
         "total_nutrition": meal_entry["nutrition"],
-        "date": meal_entry["date"]
+        "date": meal_entry["date"],
+        "unmatched_items": unmatched[0]
+    }), 201
+
+def normalize_meal_date(value):
+    """Any ISO date/datetime as the naive-UTC `datetime.isoformat()` string meals are stored and compared with"""
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date.isoformat()
+
+@app.route("/api/log-meals", methods=["POST"])
+@jwt_required()
+def log_meals():
+    """Log several meal entries (e.g. days synced from an offline client) in one write"""
+    data = request.json
+    user_email = get_jwt_identity()
+
+    entries = data.get("entries") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Invalid request, 'entries' must be a non-empty list"}), 400
+    if len(entries) > MEAL_BATCH_LIMIT:
+        return jsonify({"error": f"At most {MEAL_BATCH_LIMIT} entries per request"}), 400
+
+    if len(food_state.catalog) == 0:
+        return jsonify({"error": "Food database not loaded properly"}), 500
+
+    now = datetime.utcnow().isoformat()
+    parsed = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("meals"), dict):
+            return jsonify({"error": f"Entry {i} needs a 'meals' object"}), 400
+        try:
+            date = normalize_meal_date(entry.get("date", now))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Entry {i} has an invalid ISO 'date'"}), 400
+        parsed.append({"meals": entry["meals"], "date": date})
+
+    documents, unmatched = build_meal_entries(user_email, parsed)
+    meal_collection.insert_many(documents, ordered=False)
+    record_meals(nutrition_daily_collection, nutrition_totals_collection, documents)
+
+    return jsonify({
+        "message": f"Logged {len(documents)} meal entries",
+        "logged": [
+            {"date": doc["date"], "total_nutrition": doc["nutrition"], "unmatched_items": missing}
+            for doc, missing in zip(documents, unmatched)
+        ]
     }), 201
 
+MEALS_PAGE_LIMIT = 50
+MEALS_PAGE_MAX = 500
+# a request with none of these gets every meal in one response, as before paging
+MEALS_QUERY_ARGS = ("limit", "before", "from", "to", "format")
+
+def meals_query(user_email, args):
+    """Mongo filter for ?from=/?to= (YYYY-MM-DD or ISO, `to` inclusive) and the ?before= cursor"""
+    conditions = [{"user": user_email}]
+    if args.get("from"):
+        conditions.append({"date": {"$gte": normalize_meal_date(args["from"])}})
+    if args.get("to"):
+        end = normalize_meal_date(args["to"])
+        if len(args["to"]) == 10:
+            # a bare day covers the whole day
+            conditions.append({"date": {"$lt": (datetime.fromisoformat(end) + timedelta(days=1)).isoformat()}})
+        else:
+            conditions.append({"date": {"$lte": end}})
+
+    if args.get("before"):
+        # cursor is "<date>|<_id>" from next_before; meals sharing a date are ordered by _id
+        before_date, _, before_id = args["before"].partition("|")
+        if before_id:
+            conditions.append({"$or": [
+                {"date": {"$lt": before_date}},
+                {"date": before_date, "_id": {"$lt": ObjectId(before_id)}}
+            ]})
+        else:
+            conditions.append({"date": {"$lt": before_date}})
+
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
 @app.route("/api/get-meals", methods=["GET"])
 @jwt_required()
 def get_meals():
+    """Newest-first meals, ?limit= per page with ?before=<next_before> to continue.
+
+    ?format=ndjson streams every matching meal, one JSON document per line.
+    Without any query parameters all of the user's meals come back in one page.
+    """
     user_email = get_jwt_identity()
 
     try:
-       
+        query = meals_query(user_email, request.args)
+        unpaged = not any(arg in request.args for arg in MEALS_QUERY_ARGS)
+        stream = request.args.get("format") == "ndjson"
+        default_limit = 0 if stream or unpaged else MEALS_PAGE_LIMIT
+        limit = int(request.args.get("limit", default_limit))
+        if limit < 0 or (not stream and not unpaged and not 1 <= limit <= MEALS_PAGE_MAX):
+            raise ValueError(f"limit must be between 1 and {MEALS_PAGE_MAX}")
+    except (ValueError, InvalidId) as e:
+        return jsonify({"error": "Invalid meals query", "details": str(e)}), 400
+
+    try:
         print(f"🔍 Fetching meals for: {user_email}")
 
-        meals = list(meal_collection.find({"user": user_email}, {"_id": 0})) 
-        
-        print(f"✅ Retrieved Meals: {meals}")
-
-        if not meals:
-            return jsonify({"meals": [], "message": "No meals found"}), 200 
-        total_nutrition = {
-            "calories": sum(meal.get("nutrition", {}).get("calories", 0) for meal in meals),
-            "protein": sum(meal.get("nutrition", {}).get("protein", 0) for meal in meals),
-            "carbs": sum(meal.get("nutrition", {}).get("carbs", 0) for meal in meals),
-            "fats": sum(meal.get("nutrition", {}).get("fats", 0) for meal in meals),
-        }
+        cursor = meal_collection.find(query).sort([("date", -1), ("_id", -1)])
+
+        if stream:
+            cursor = cursor.limit(limit).batch_size(500)
 
-        return jsonify({"meals": meals, "overall_nutrition": total_nutrition}), 200
+            def generate():
+                try:
+                    for meal in cursor:
+                        meal.pop("_id", None)
+                        yield json_util.dumps(meal) + "\n"
+                finally:
+                    cursor.close()
+
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        if unpaged:
+            meals, next_before = list(cursor), None
+        else:
+            meals = list(cursor.limit(limit + 1))
+            has_more = len(meals) > limit
+            meals = meals[:limit]
+            next_before = f"{meals[-1]['date']}|{meals[-1]['_id']}" if has_more else None
+        for meal in meals:
+            meal.pop("_id", None)
+
+        if not meals and not request.args.get("before"):
+            return jsonify({"meals": [], "message": "No meals found", "next_before": None}), 200 
+        totals = lifetime_totals(meal_collection, nutrition_totals_collection, user_email)
+        total_nutrition = {key: totals[key] for key in NUTRITION_KEYS}
+
+        return jsonify({"meals": meals, "overall_nutrition": total_nutrition, "next_before": next_before}), 200
 
     except Exception as e:
         print(f"⚠ Error fetching meals: {e}")  
         return jsonify({"error": "Failed to load meals", "details": str(e)}), 500
 
+@app.route("/api/nutrition-summary", methods=["GET"])
+@jwt_required()
+def nutrition_summary():
+    """Daily nutrition rollups between ?from= and ?to= (YYYY-MM-DD, default last 30 days) plus lifetime totals"""
+    user_email = get_jwt_identity()
+    try:
+        end = datetime.strptime(request.args["to"], "%Y-%m-%d") if "to" in request.args else datetime.utcnow()
+        start = datetime.strptime(request.args["from"], "%Y-%m-%d") if "from" in request.args else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"error": "from and to must be YYYY-MM-DD dates"}), 400
+    if start > end or (end - start).days > 366:
+        return jsonify({"error": "Date range must be ascending and at most 366 days"}), 400
+
+    days = list(nutrition_daily_collection.find(
+        {"user": user_email, "date": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}},
+        {"_id": 0, "user": 0, "updated_at": 0}
+    ).sort("date", 1))
+
+    return jsonify({
+        "daily": days,
+        "lifetime": lifetime_totals(meal_collection, nutrition_totals_collection, user_email)
+    }), 200
+
 @app.route("/api/get-food-items", methods=["GET"])
 def get_food_items():
-    return jsonify({"food_items": list(food_database.keys())})
+    catalog = food_state.catalog
+    if not any(arg in request.args for arg in ("prefix", "limit", "offset")):
+        return jsonify({"food_items": catalog.names})
+
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    matches, total = catalog.search(request.args.get("prefix", ""), limit, offset)
+    return jsonify({"food_items": matches, "total": total, "limit": limit, "offset": offset})
 
 @app.route("/api/track-progress", methods=["POST"])
 @jwt_required()
@@ -1786,5 +2156,7 @@ def test_read_excel():
         return jsonify({"status": "error", "message": str(e)})
 
 if __name__ == "__main__":
+    from migrations import migrate
+    migrate(db)
     port = int(os.environ.get("PORT", 10000)) 
     app.run(host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,92 @@
+"""Compare the old three-round-trip step write with the single upsert.
+
+Run from backend/:  python benchmarks/bench_step_writes.py [--writes 500]
+
+With MONGO_URI set, both paths run against a scratch database on that server
+(HealthFitnessApp_bench, dropped afterwards) and every command the driver
+sends is counted. Without it they run against mongomock, which shows the
+in-process cost only; the round trips are what dominate against Atlas.
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+from pymongo import MongoClient, monitoring
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def write_old(db, email, date, steps):
+    if "steps" not in db.list_collection_names():
+        db.create_collection("steps")
+    last_entry = db.steps.find_one({"email": email, "date": date})
+    if not last_entry:
+        db.steps.insert_one({"email": email, "date": date, "steps": steps, "last_updated": datetime.utcnow()})
+    else:
+        db.steps.update_one({"email": email, "date": date},
+                            {"$set": {"steps": steps, "last_updated": datetime.utcnow()}}, upsert=True)
+
+
+def write_upsert(db, email, date, steps):
+    db.steps.update_one({"email": email, "date": date},
+                        {"$set": {"steps": steps, "last_updated": datetime.utcnow()}}, upsert=True)
+
+
+def run(db, write, writes, counter, users=20):
+    """(per-write latencies in ms, commands sent) for a StepCounter-like stream of climbing daily counts"""
+    db.steps.drop()
+    db.steps.create_index([("email", 1), ("date", 1)], unique=True)
+    date = datetime.utcnow().strftime("%Y-%m-%d")
+    latencies = []
+    commands = counter.count
+    for i in range(writes):
+        started = time.perf_counter()
+        write(db, f"user{i % users}@example.com", date, i * 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.array(latencies), counter.count - commands
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    counter = CommandCounter()
+    uri = os.getenv("MONGO_URI")
+    if uri:
+        client = MongoClient(uri, event_listeners=[counter])
+        target = "MongoDB at MONGO_URI"
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        target = "mongomock (in-process, no network)"
+    db = client.HealthFitnessApp_bench
+
+    print(f"{args.writes} step writes against {target}")
+    try:
+        for label, write in [("old", write_old), ("upsert", write_upsert)]:
+            latencies, commands = run(db, write, args.writes, counter)
+            print(f"{label:>7}: p50 {np.percentile(latencies, 50):7.3f} ms  p95 {np.percentile(latencies, 95):7.3f} ms"
+                  + (f"  {commands / args.writes:.2f} commands per write" if uri else ""))
+    finally:
+        client.drop_database("HealthFitnessApp_bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare the old per-request DataFrame filtering with the precomputed bitmaps.
+
+Run from backend/:  python benchmarks/bench_workout_filters.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from exercise_catalog import ExerciseCatalog
+
+PROFILES = [
+    ("beginner", "all", ["body weight", "dumbbell"]),
+    ("intermediate", "upper arms", ["barbell", "dumbbell", "cable"]),
+    ("low-impact", "all", ["body weight", "resistance band"]),
+    ("advanced", "upper legs", ["barbell", "leverage machine", "body weight"]),
+]
+
+
+def filter_with_pandas(exercises_df, intensity, preferred_body_part, equipment_available):
+    filtered_exercises = exercises_df.copy()
+
+    if intensity == 'beginner':
+        filtered_exercises = filtered_exercises[~filtered_exercises['name'].str.contains('advanced|pro', case=False)]
+    elif intensity == 'low-impact':
+        filtered_exercises = filtered_exercises[filtered_exercises['equipment'].str.contains('body weight|resistance band', case=False)]
+
+    if preferred_body_part != "all":
+        filtered_exercises = filtered_exercises[filtered_exercises['bodyPart'] == preferred_body_part]
+
+    filtered_exercises = filtered_exercises[filtered_exercises['equipment'].isin(equipment_available)]
+
+    arm_exercises = filtered_exercises[filtered_exercises['bodyPart'].str.lower().str.contains("arm")]
+    leg_exercises = filtered_exercises[filtered_exercises['bodyPart'].str.lower().str.contains("leg")]
+    return arm_exercises.index.to_numpy(), leg_exercises.index.to_numpy()
+
+
+def filter_with_bitmaps(catalog, intensity, preferred_body_part, equipment_available):
+    candidates = catalog.candidate_mask(intensity, preferred_body_part, equipment_available)
+    arm_positions = np.flatnonzero(candidates & catalog.group_masks["arms"])
+    leg_positions = np.flatnonzero(candidates & catalog.group_masks["legs"])
+    return arm_positions, leg_positions
+
+
+def main(repeat=200):
+    csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fitness_exercises.csv")
+    exercises_df = pd.read_csv(csv_path)
+    catalog = ExerciseCatalog.from_dataframe(exercises_df)
+
+    for profile in PROFILES:
+        old = filter_with_pandas(exercises_df, *profile)
+        new = filter_with_bitmaps(catalog, *profile)
+        assert all(np.array_equal(a, b) for a, b in zip(old, new)), f"Results differ for {profile}"
+
+    print(f"{len(exercises_df)} exercises, {len(PROFILES)} profiles, best of 5 x {repeat} runs")
+    for label, fn, data in [("pandas", filter_with_pandas, exercises_df), ("bitmaps", filter_with_bitmaps, catalog)]:
+        best = min(timeit.repeat(lambda: [fn(data, *p) for p in PROFILES], number=repeat, repeat=5))
+        print(f"{label:>8}: {best / (repeat * len(PROFILES)) * 1e6:8.1f} µs per request")
+
+
+if __name__ == "__main__":
+    main()
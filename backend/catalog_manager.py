@@ -0,0 +1,135 @@
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime
+
+
+def sources_signature(paths):
+    """Cheap change check: (mtime_ns, size) of every source, None for a missing file"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def source_hash(path):
+    """sha1 hex digest of a file's contents, read in 1 MiB blocks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sources_version(paths):
+    """Content hash of the sources; matches the sha prefix used in artifact names for a single file"""
+    digests = [source_hash(path) if os.path.exists(path) else hashlib.sha1().hexdigest() for path in paths]
+    if len(digests) == 1:
+        return digests[0][:16]
+    return hashlib.sha1("".join(digests).encode()).hexdigest()[:16]
+
+
+class CatalogManager:
+    """Reloads catalogs whose source files change, without restarting the worker.
+
+    Each catalog is registered with its source paths, a `load()` that builds a new
+    value and an `install(value)` that publishes it. `poll()` runs before every
+    request: at most once per check_interval it stats the sources, and on a change
+    hashes them and runs `load()` on a background thread. The finished value is
+    installed by a later `poll()`, i.e. between requests, so a request always sees
+    the version it started with. A failed load keeps the old version.
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, sources, load, install):
+        """Track a catalog that has already been loaded and installed from sources"""
+        self._entries[name] = {
+            "sources": list(sources),
+            "load": load,
+            "install": install,
+            "signature": sources_signature(sources),
+            "version": sources_version(sources),
+            "loaded_at": datetime.utcnow(),
+            "checked_at": time.monotonic(),
+            "reload_ms": None,
+            "reloads": 0,
+            "last_error": None,
+            "building": None,
+            "ready": None,
+        }
+
+    def poll(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            for name, entry in self._entries.items():
+                if entry["ready"] is not None:
+                    self._install(name, entry)
+                if entry["building"] is not None:
+                    continue
+                if not force and now - entry["checked_at"] < self.check_interval:
+                    continue
+                entry["checked_at"] = now
+                signature = sources_signature(entry["sources"])
+                if signature == entry["signature"]:
+                    continue
+                entry["building"] = threading.Thread(
+                    target=self._build, args=(name, entry, signature), daemon=True
+                )
+                entry["building"].start()
+
+    def _build(self, name, entry, signature):
+        started = time.perf_counter()
+        try:
+            version = sources_version(entry["sources"])
+            if version == entry["version"]:
+                # touched but unchanged
+                entry["signature"] = signature
+                return
+            value = entry["load"]()
+            entry["ready"] = (value, version, signature, round((time.perf_counter() - started) * 1000, 2))
+            print(f"🔄 Built {name} catalog {version} in {entry['ready'][3]} ms")
+        except Exception as e:
+            entry["signature"] = signature
+            entry["last_error"] = f"{type(e).__name__}: {e}"
+            print(f"⚠ Reloading {name} catalog failed, keeping {entry['version']}: {e}")
+        finally:
+            entry["building"] = None
+
+    def _install(self, name, entry):
+        value, version, signature, reload_ms = entry["ready"]
+        entry["ready"] = None
+        entry["install"](value)
+        entry.update(
+            signature=signature, version=version, reload_ms=reload_ms,
+            loaded_at=datetime.utcnow(), last_error=None, reloads=entry["reloads"] + 1
+        )
+        print(f"✅ Switched {name} catalog to {version}")
+
+    def wait(self, timeout=None):
+        """Block until background builds finish (tests and CLI use)"""
+        for entry in list(self._entries.values()):
+            thread = entry["building"]
+            if thread is not None:
+                thread.join(timeout)
+
+    def status(self):
+        return {
+            name: {
+                "version": entry["version"],
+                "loaded_at": entry["loaded_at"].isoformat(),
+                "reload_ms": entry["reload_ms"],
+                "reloads": entry["reloads"],
+                "reloading": entry["building"] is not None or entry["ready"] is not None,
+                "last_error": entry["last_error"],
+            }
+            for name, entry in self._entries.items()
+        }
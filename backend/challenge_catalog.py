@@ -0,0 +1,83 @@
+import time
+import threading
+from datetime import datetime
+from pymongo import ReturnDocument
+
+CHALLENGES_VERSION_ID = "challenges"
+
+
+class ChallengeCatalog:
+    """Process-local copy of the challenges collection, invalidated by a version counter.
+
+    The counter lives in catalog_versions ({_id: "challenges", version}) and is
+    bumped by every catalog write through `bump()`. Readers compare it with the
+    loaded version at most once per check_interval, and reload the whole (tiny)
+    catalog only when it moved, so looking a challenge up by name normally costs
+    no round trip. A name that is not cached forces a version check first, so a
+    challenge just added by another worker is found immediately.
+    """
+
+    def __init__(self, challenges, versions, check_interval=10):
+        self.challenges = challenges
+        self.versions = versions
+        self.check_interval = check_interval
+        self._by_name = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.reloads = 0
+        self.version_checks = 0
+
+    def current_version(self):
+        self.version_checks += 1
+        doc = self.versions.find_one({"_id": CHALLENGES_VERSION_ID}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._by_name is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            version = self.current_version()
+            self._checked_at = now
+            if self._by_name is not None and version == self._version:
+                return
+            # read the version before the documents: a write racing the reload bumps past it and is picked up next check
+            challenges = list(self.challenges.find({}, {"_id": 0}))
+            self._by_name = {challenge["name"]: challenge for challenge in challenges}
+            self._version = version
+            self.loaded_at = datetime.utcnow()
+            self.reloads += 1
+            print(f"🔄 Loaded {len(challenges)} challenges (catalog version {version})")
+
+    def all(self):
+        self.refresh()
+        return list(self._by_name.values())
+
+    def get(self, name):
+        self.refresh()
+        challenge = self._by_name.get(name)
+        if challenge is None:
+            self.refresh(force=True)
+            challenge = self._by_name.get(name)
+        return challenge
+
+    def bump(self):
+        """Record a catalog write and reload this worker's copy; other workers follow on their next check"""
+        doc = self.versions.find_one_and_update(
+            {"_id": CHALLENGES_VERSION_ID}, {"$inc": {"version": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self.refresh(force=True)
+        return doc["version"]
+
+    def status(self):
+        return {
+            "version": self._version,
+            "challenges": len(self._by_name) if self._by_name is not None else None,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "reloads": self.reloads,
+            "version_checks": self.version_checks,
+            "check_interval": self.check_interval,
+        }
@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import numpy as np
+
+DIET_FEATURES = ["BMI", "FCVC", "NCP", "FAF", "CH2O"]
+# Written into every artifact's metadata; CentroidModel.load refuses any other format
+DIET_MODEL_FORMAT = 1
+
+
+class CentroidModel:
+    """KMeans prediction from exported centroids: each row goes to its nearest centre.
+
+    Same labels as KMeans.predict, without scikit-learn or unpickling at serve time.
+    """
+
+    def __init__(self, centroids, features=DIET_FEATURES, metadata=None):
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.features = list(features)
+        self.metadata = dict(metadata or {})
+        if self.centroids.ndim != 2 or self.centroids.shape[1] != len(self.features):
+            raise ValueError(f"Expected centroids of shape (k, {len(self.features)}), got {self.centroids.shape}")
+
+    def predict(self, rows):
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        if rows.shape[1] != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} features ({', '.join(self.features)}), got {rows.shape[1]}")
+        distances = ((rows[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1)
+
+    def save(self, path):
+        metadata = {**self.metadata, "format": DIET_MODEL_FORMAT, "features": self.features, "k": len(self.centroids)}
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, features=np.array(self.features),
+                 metadata=np.array(json.dumps(metadata)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, expected_features=DIET_FEATURES):
+        """Load and validate an artifact written by save(); raises ValueError if it does not fit this server"""
+        with np.load(path) as artifact:
+            if "metadata" not in artifact:
+                raise ValueError(f"{os.path.basename(path)} has no metadata; re-export it with train_diet_model.py")
+            metadata = json.loads(artifact["metadata"].item())
+            model = cls(artifact["centroids"], artifact["features"].tolist(), metadata)
+
+        if metadata.get("format") != DIET_MODEL_FORMAT:
+            raise ValueError(f"{os.path.basename(path)} has format {metadata.get('format')}, expected {DIET_MODEL_FORMAT}")
+        if model.features != list(expected_features) or metadata.get("features") != model.features:
+            raise ValueError(f"{os.path.basename(path)} was trained on {model.features}, expected {list(expected_features)}")
+        if metadata.get("k") != len(model.centroids) or not np.isfinite(model.centroids).all():
+            raise ValueError(f"{os.path.basename(path)} centroids do not match its metadata")
+        return model
+
+
+def export_centroids(kmeans, path, features=DIET_FEATURES, metadata=None):
+    model = CentroidModel(kmeans.cluster_centers_, features, metadata)
+    model.save(path)
+    return model
+
+
+if __name__ == "__main__":
+    # python diet_model.py [diet_kmeans.pkl] [diet_centroids.npz]: export a pickled model trained before the pipeline
+    import joblib
+    pkl_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.getcwd(), "diet_kmeans.pkl")
+    npz_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.getcwd(), "diet_centroids.npz")
+    kmeans = joblib.load(pkl_path)
+    model = export_centroids(kmeans, npz_path, metadata={
+        "model_version": f"k{kmeans.n_clusters}-{os.path.basename(pkl_path)}",
+        "algorithm": type(kmeans).__name__,
+        "inertia": float(kmeans.inertia_),
+        "source": os.path.basename(pkl_path),
+    })
+    print(f"✅ Exported {len(model.centroids)} centroids to {npz_path}")
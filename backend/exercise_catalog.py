@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from catalog_manager import source_hash
+
+NEIGHBOR_K = 10
+
+# Bump whenever the on-disk layout below changes; old artifacts are then ignored
+ARTIFACT_VERSION = 1
+TEXT_COLUMNS = ['bodyPart', 'equipment', 'gifUrl', 'name', 'target']
+
+
+def build_tag_matrix(exercises_df):
+    """TF-IDF vectors over the bodyPart/equipment/target tags of each exercise"""
+    # imported here so serving a prebuilt artifact never loads scikit-learn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    tags = exercises_df['bodyPart'] + ' ' + exercises_df['equipment'] + ' ' + exercises_df['target']
+    tfidf = TfidfVectorizer(stop_words='english')
+    return tfidf.fit_transform(tags)
+
+
+def build_neighbor_index(tag_matrix, k=NEIGHBOR_K, chunk_size=512):
+    """Top-k most similar exercises for every row, best first, excluding the row itself.
+
+    Returns (ids, scores) as int32 / float32 arrays of shape (n, k). Similarities are
+    computed one chunk of rows at a time so the full n x n matrix never exists.
+    """
+    n = tag_matrix.shape[0]
+    k = min(k, max(n - 1, 0))
+    ids = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return ids, scores
+
+    # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        sim = (tag_matrix[start:stop] @ tag_matrix.T).toarray()
+        rows = np.arange(stop - start)
+        sim[rows, rows + start] = -np.inf
+
+        top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sim, top, axis=1)
+        # best score first, lower row id first on ties
+        order = np.lexsort((top, -top_scores), axis=1)
+        ids[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    return ids, scores
+
+
+def format_gif_url(exercise_id):
+    try:
+        exercise_id = str(int(exercise_id)).zfill(4)  
+        return f"https://d205bpvrqc9yn1.cloudfront.net/{exercise_id}.gif"
+    except:
+        return None
+
+
+def similar_exercises(neighbor_ids, position, n=3):
+    """Row positions of the n exercises most similar to the one at `position`"""
+    return neighbor_ids[position, :n]
+
+
+class ExerciseCatalog:
+    """Exercise rows plus their tag vectors and neighbour tables.
+
+    When opened from an artifact the numeric arrays are read-only memory maps, so
+    every gunicorn worker shares the same physical pages.
+    """
+
+    def __init__(self, df, tag_matrix, neighbor_ids, neighbor_scores, version=None):
+        self.df = df
+        self.tag_matrix = tag_matrix
+        self.neighbor_ids = neighbor_ids
+        self.neighbor_scores = neighbor_scores
+        self.version = version
+
+        ids = np.asarray(df['id']).tolist() if 'id' in df else []
+        self.positions = dict(zip(ids, range(len(ids))))
+        if len(self.positions) != len(ids):
+            raise ValueError("Exercise catalog contains duplicate ids")
+
+        self._build_filter_masks()
+        self.records = self._build_records()
+
+    def _build_filter_masks(self):
+        """Boolean row masks for every filter get_personalized_workouts applies"""
+        n = len(self.df)
+        body_part = self.df['bodyPart'].astype(str)
+        equipment = self.df['equipment'].astype(str)
+        name = self.df['name'].astype(str)
+
+        self.all_mask = np.ones(n, dtype=bool)
+        self.none_mask = np.zeros(n, dtype=bool)
+        self.intensity_masks = {
+            'beginner': ~name.str.contains('advanced|pro', case=False).to_numpy(dtype=bool),
+            'low-impact': equipment.str.contains('body weight|resistance band', case=False).to_numpy(dtype=bool),
+        }
+        self.body_part_masks = {value: (body_part == value).to_numpy() for value in body_part.unique()}
+        self.equipment_masks = {value: (equipment == value).to_numpy() for value in equipment.unique()}
+        self.group_masks = {
+            'arms': body_part.str.lower().str.contains('arm').to_numpy(dtype=bool),
+            'legs': body_part.str.lower().str.contains('leg').to_numpy(dtype=bool),
+        }
+
+    @classmethod
+    def from_dataframe(cls, df, k=NEIGHBOR_K):
+        df = df.reset_index(drop=True)
+        tag_matrix = build_tag_matrix(df)
+        neighbor_ids, neighbor_scores = build_neighbor_index(tag_matrix, k)
+        return cls(df, tag_matrix, neighbor_ids, neighbor_scores)
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    def _build_records(self):
+        """JSON-ready dict per row with gifUrl resolved, so requests never touch pandas"""
+        records = self.df.astype(object).where(self.df.notna(), None).to_dict('records')
+        for record in records:
+            record['id'] = int(record['id'])
+            record['gifUrl'] = format_gif_url(record['id'])
+            record['tags'] = f"{record['bodyPart']} {record['equipment']} {record['target']}"
+        return records
+
+    def sample_records(self, n, positions=None, rng=None):
+        """Up to n distinct records drawn at random, optionally only from the given row positions"""
+        if positions is None:
+            positions = len(self.records)
+            size = min(n, positions)
+        else:
+            size = min(n, len(positions))
+        picked = (rng or np.random).choice(positions, size, replace=False)
+        return [self.records[i] for i in picked]
+
+    def candidate_mask(self, intensity, body_part="all", equipment=()):
+        """Rows matching an intensity level, body part and the user's available equipment"""
+        mask = self.intensity_masks.get(intensity, self.all_mask).copy()
+        if body_part != "all":
+            mask &= self.body_part_masks.get(body_part, self.none_mask)
+
+        if isinstance(equipment, str):
+            equipment = [equipment]
+        equipment_mask = self.none_mask.copy()
+        for value in equipment:
+            equipment_mask |= self.equipment_masks.get(value, self.none_mask)
+        return mask & equipment_mask
+
+    def position(self, exercise_id):
+        """Row position of an exercise id, or None if it is not in the catalog"""
+        try:
+            return self.positions.get(int(exercise_id))
+        except (TypeError, ValueError):
+            return None
+
+    def lookup(self, exercise_ids):
+        """Resolve many ids at once; returns (positions, unknown_ids)"""
+        positions, unknown = [], []
+        for exercise_id in exercise_ids:
+            pos = self.position(exercise_id)
+            if pos is None:
+                unknown.append(exercise_id)
+            else:
+                positions.append(pos)
+        return positions, unknown
+
+
+def artifact_path(csv_path, artifact_root):
+    """Directory holding the artifact built from the current contents of csv_path"""
+    return os.path.join(artifact_root, f"exercises-v{ARTIFACT_VERSION}-{source_hash(csv_path)[:16]}")
+
+
+def build_artifact(csv_path, artifact_root, k=NEIGHBOR_K):
+    """Compile fitness_exercises.csv into a directory of .npy files and return its path.
+
+    The directory is written under a temporary name and renamed into place, so
+    concurrent builders and readers never see a half-written artifact.
+    """
+    target = artifact_path(csv_path, artifact_root)
+    if os.path.isdir(target):
+        return target
+
+    df = pd.read_csv(csv_path)
+    catalog = ExerciseCatalog.from_dataframe(df, k)
+    tag_matrix = catalog.tag_matrix.tocsr()
+
+    os.makedirs(artifact_root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.build-', dir=artifact_root)
+    try:
+        arrays = {
+            'exercise_ids': df['id'].to_numpy(dtype=np.int32),
+            'neighbor_ids': catalog.neighbor_ids,
+            'neighbor_scores': catalog.neighbor_scores,
+            'tag_data': tag_matrix.data.astype(np.float32),
+            'tag_indices': tag_matrix.indices.astype(np.int32),
+            'tag_indptr': tag_matrix.indptr.astype(np.int32),
+        }
+        for column in TEXT_COLUMNS:
+            arrays[f'col_{column}'] = df[column].fillna('').to_numpy(dtype=str)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), array)
+
+        meta = {
+            'version': ARTIFACT_VERSION,
+            'source': os.path.basename(csv_path),
+            'source_sha1': source_hash(csv_path),
+            'rows': len(df),
+            'k': catalog.neighbor_ids.shape[1],
+            'tag_shape': list(tag_matrix.shape),
+            'built_at': datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # another worker finished the same build first
+            if not os.path.isdir(target):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return target
+
+
+def open_artifact(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != ARTIFACT_VERSION:
+        raise RuntimeError(f"Exercise artifact {path} has version {meta.get('version')}, expected {ARTIFACT_VERSION}")
+
+    def load(name):
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+    df = pd.DataFrame({column: load(f'col_{column}') for column in TEXT_COLUMNS})
+    df['id'] = load('exercise_ids')
+    tag_matrix = csr_matrix(
+        (load('tag_data'), load('tag_indices'), load('tag_indptr')),
+        shape=tuple(meta['tag_shape'])
+    )
+    return ExerciseCatalog(df, tag_matrix, load('neighbor_ids'), load('neighbor_scores'), version=meta)
+
+
+def load_catalog(csv_path, artifact_root, rebuild=True):
+    """Open the artifact matching csv_path, building it first if it is missing or stale.
+
+    With rebuild=False a missing or stale artifact raises instead, for deployments
+    that build it once before starting the workers.
+    """
+    path = artifact_path(csv_path, artifact_root)
+    if not os.path.isdir(path):
+        if not rebuild:
+            raise RuntimeError(
+                f"No exercise artifact for the current {os.path.basename(csv_path)} in {artifact_root}; "
+                f"run `python exercise_catalog.py build` first"
+            )
+        print(f"🔨 Building exercise artifact at {path}")
+        build_artifact(csv_path, artifact_root)
+    return open_artifact(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the precomputed exercise artifact")
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--csv', default=os.path.join(os.getcwd(), 'fitness_exercises.csv'))
+    parser.add_argument('--out', default=os.path.join(os.getcwd(), 'artifacts'))
+    parser.add_argument('-k', type=int, default=NEIGHBOR_K, help="neighbours kept per exercise")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        path = build_artifact(args.csv, args.out, args.k)
+        print(f"✅ Exercise artifact ready at {path}")
+        return 0
+
+    path = artifact_path(args.csv, args.out)
+    if not os.path.isdir(path):
+        print(f"❌ Exercise artifact is missing or stale: {path}")
+        return 1
+    print(json.dumps(open_artifact(path).version, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import bisect
+import numpy as np
+import pandas as pd
+from catalog_manager import source_hash
+
+# Part of the cache file name, next to the spreadsheet hash
+FOOD_CACHE_VERSION = 1
+FOOD_NAME_COLUMN = "Food Name"
+FOOD_NUTRIENT_COLUMNS = ["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]
+
+
+def food_cache_path(xlsx_path, cache_dir):
+    return os.path.join(cache_dir, f"food_database-v{FOOD_CACHE_VERSION}-{source_hash(xlsx_path)[:16]}.npz")
+
+
+def read_food_spreadsheet(xlsx_path):
+    """Parse food_database.xlsx into (names, nutrients) with openpyxl; slow, used only on a cache miss"""
+    df = pd.read_excel(xlsx_path, engine="openpyxl")
+    missing = [col for col in [FOOD_NAME_COLUMN] + FOOD_NUTRIENT_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} not found in {os.path.basename(xlsx_path)}")
+
+    df = df.fillna(0)
+    df[FOOD_NUTRIENT_COLUMNS] = df[FOOD_NUTRIENT_COLUMNS].apply(pd.to_numeric, errors="coerce").fillna(0)
+    df[FOOD_NAME_COLUMN] = df[FOOD_NAME_COLUMN].astype(str)
+    df = df.drop_duplicates(FOOD_NAME_COLUMN, keep="last")
+
+    return df[FOOD_NAME_COLUMN].to_numpy(dtype=str), df[FOOD_NUTRIENT_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def load_food_table(xlsx_path, cache_dir):
+    """(names, nutrients) for the spreadsheet, from an .npz cache keyed by the file's hash.
+
+    nutrients has one row per name and FOOD_NUTRIENT_COLUMNS as columns. The cache is
+    written on the first load after the spreadsheet changes.
+    """
+    cache_path = food_cache_path(xlsx_path, cache_dir)
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return cached["names"], cached["nutrients"]
+
+    names, nutrients = read_food_spreadsheet(xlsx_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, names=names, nutrients=nutrients)
+    os.replace(tmp_path, cache_path)
+    return names, nutrients
+
+
+def normalize_food_name(name):
+    """Case- and whitespace-insensitive lookup key for a food name"""
+    return " ".join(str(name).lower().split())
+
+
+class FoodCatalog:
+    """Food names with integer ids, their nutrient rows and a sorted prefix index.
+
+    Ids are positions in `names`; `nutrients` has one FOOD_NUTRIENT_COLUMNS row per id.
+    """
+
+    def __init__(self, names, nutrients):
+        self.names = [str(name) for name in names]
+        self.nutrients = np.asarray(nutrients, dtype=np.float64).reshape(len(self.names), len(FOOD_NUTRIENT_COLUMNS))
+
+        keys = [normalize_food_name(name) for name in self.names]
+        order = sorted(range(len(keys)), key=lambda i: (keys[i], i))
+        self._sorted_keys = [keys[i] for i in order]
+        self._sorted_ids = order
+        self.ids = {}
+        for i in order:
+            self.ids.setdefault(keys[i], i)
+
+    @classmethod
+    def from_dict(cls, food_dict):
+        names = list(food_dict)
+        nutrients = [[food_dict[name].get(col, 0) for col in FOOD_NUTRIENT_COLUMNS] for name in names]
+        return cls(names, nutrients)
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, name):
+        """Id of the food matching name case- and whitespace-insensitively, or None"""
+        if not isinstance(name, str):
+            return None
+        return self.ids.get(normalize_food_name(name))
+
+    def resolve_many(self, names):
+        """(int32 ids, unmatched names) for a list of food names"""
+        ids, unmatched = [], []
+        for name in names:
+            food_id = self.resolve(name)
+            if food_id is None:
+                unmatched.append(name)
+            else:
+                ids.append(food_id)
+        return np.asarray(ids, dtype=np.int32), unmatched
+
+    def totals(self, id_lists):
+        """(len(id_lists), len(FOOD_NUTRIENT_COLUMNS)) nutrient sums, one gather over all lists"""
+        lengths = [len(ids) for ids in id_lists]
+        sums = np.zeros((len(id_lists), self.nutrients.shape[1]))
+        if sum(lengths):
+            owners = np.repeat(np.arange(len(id_lists)), lengths)
+            np.add.at(sums, owners, self.nutrients[np.concatenate(id_lists)])
+        return sums
+
+    def search(self, prefix, limit=20, offset=0):
+        """(names, total) for foods whose normalised name starts with prefix, alphabetically"""
+        key = normalize_food_name(prefix)
+        lo = bisect.bisect_left(self._sorted_keys, key)
+        hi = bisect.bisect_left(self._sorted_keys, key + "\uffff", lo)
+        start = min(lo + offset, hi)
+        return [self.names[i] for i in self._sorted_ids[start:min(start + limit, hi)]], hi - lo
+
+
+class NutrientNeighbors:
+    """Exact k-nearest-neighbour search over nutrient rows, brute force in numpy.
+
+    Drop-in for the NearestNeighbors calls the meal planner makes; the food table is
+    small enough that one vectorised distance matrix per batch beats a tree.
+    """
+
+    def __init__(self, n_neighbors=5):
+        self.n_neighbors = n_neighbors
+        self.points = None
+
+    def fit(self, points):
+        self.points = np.asarray(points, dtype=np.float64)
+        return self
+
+    def kneighbors(self, queries, n_neighbors=None):
+        """(distances, indices) of shape (len(queries), k), nearest first"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        k = min(n_neighbors or self.n_neighbors, len(self.points))
+        distances = np.sqrt(((queries[:, None, :] - self.points[None, :, :]) ** 2).sum(axis=2))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1, kind="stable")
+        indices = np.take_along_axis(nearest, order, axis=1)
+        return np.take_along_axis(distances, indices, axis=1), indices
+
+
+if __name__ == "__main__":
+    xlsx_path = os.path.join(os.getcwd(), "food_database.xlsx")
+    cache_dir = os.getenv("ARTIFACT_DIR", os.path.join(os.getcwd(), "artifacts"))
+    names, _ = load_food_table(xlsx_path, cache_dir)
+    print(f"✅ Food cache for {len(names)} items ready at {food_cache_path(xlsx_path, cache_dir)}")
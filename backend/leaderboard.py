@@ -0,0 +1,269 @@
+import time
+import bisect
+import threading
+from collections import OrderedDict
+
+LEADERBOARD_LIMIT = 50
+LEADERBOARD_MAX_LIMIT = 100
+RANK_NEIGHBORS = 2
+
+# progress desc with email as tie-break; matches the (challenge_name, progress, email) index
+LEADERBOARD_SORT = {"progress": -1, "email": 1}
+REVERSE_SORT = {"progress": 1, "email": -1}
+
+
+def leaderboard_pipeline(match, sort=LEADERBOARD_SORT, limit=LEADERBOARD_LIMIT, offset=0):
+    """Sorted, paged leaderboard rows with usernames joined from users in the same query"""
+    return [
+        {"$match": match},
+        {"$sort": sort},
+        {"$skip": offset},
+        {"$limit": limit},
+        {"$lookup": {"from": "users", "localField": "email", "foreignField": "email", "as": "user"}},
+        {"$project": {
+            "_id": 0,
+            "progress": 1,
+            "username": {"$ifNull": [{"$arrayElemAt": ["$user.username", 0]}, "$email"]}
+        }},
+    ]
+
+
+def ranked_above(challenge_name, progress, email):
+    return {"challenge_name": challenge_name, "$or": [
+        {"progress": {"$gt": progress}},
+        {"progress": progress, "email": {"$lt": email}},
+    ]}
+
+
+def ranked_below(challenge_name, progress, email):
+    return {"challenge_name": challenge_name, "$or": [
+        {"progress": {"$lt": progress}},
+        {"progress": progress, "email": {"$gt": email}},
+    ]}
+
+
+def leaderboard_page(collection, challenge_name, limit=LEADERBOARD_LIMIT, offset=0):
+    """(rows with 1-based rank, has_more) for one page of a challenge"""
+    rows = list(collection.aggregate(
+        leaderboard_pipeline({"challenge_name": challenge_name}, limit=limit + 1, offset=offset)
+    ))
+    for i, row in enumerate(rows):
+        row["rank"] = offset + i + 1
+    return rows[:limit], len(rows) > limit
+
+
+def user_rank(collection, challenge_name, email, neighbors=RANK_NEIGHBORS):
+    """The caller's row, rank and up to `neighbors` rows either side, or None if they have not joined.
+
+    Rank is 1 + the number of entries ahead of them (more progress, or equal progress
+    and a smaller email), an index-backed count, so it costs the same on any page.
+    """
+    entry = collection.find_one({"email": email, "challenge_name": challenge_name}, {"_id": 0, "progress": 1})
+    if entry is None:
+        return None
+    progress = entry.get("progress", 0)
+
+    rank = collection.count_documents(ranked_above(challenge_name, progress, email)) + 1
+    me = list(collection.aggregate(leaderboard_pipeline({"challenge_name": challenge_name, "email": email}, limit=1)))[0]
+    me["rank"] = rank
+
+    above, below = [], []
+    if neighbors:
+        above = list(collection.aggregate(
+            leaderboard_pipeline(ranked_above(challenge_name, progress, email), sort=REVERSE_SORT, limit=neighbors)
+        ))[::-1]
+        below = list(collection.aggregate(
+            leaderboard_pipeline(ranked_below(challenge_name, progress, email), limit=neighbors)
+        ))
+    for i, row in enumerate(above):
+        row["rank"] = rank - len(above) + i
+    for i, row in enumerate(below):
+        row["rank"] = rank + 1 + i
+
+    return {**me, "above": above, "below": below}
+
+
+def load_board_rows(collection, challenge_name):
+    """Every (email, progress, username) row of a challenge, for a cache rebuild"""
+    return list(collection.aggregate([
+        {"$match": {"challenge_name": challenge_name}},
+        {"$lookup": {"from": "users", "localField": "email", "foreignField": "email", "as": "user"}},
+        {"$project": {
+            "_id": 0,
+            "email": 1,
+            "progress": 1,
+            "username": {"$ifNull": [{"$arrayElemAt": ["$user.username", 0]}, "$email"]}
+        }},
+    ]))
+
+
+class ChallengeBoard:
+    """One challenge's entries kept sorted by (-progress, email), the leaderboard order.
+
+    Rank lookups are a bisect, O(log n); a page is a slice.
+    """
+
+    def __init__(self, rows=()):
+        self.progress = {}
+        self.usernames = {}
+        for row in rows:
+            self.progress[row["email"]] = row.get("progress", 0)
+            self.usernames[row["email"]] = row.get("username") or row["email"]
+        self.keys = sorted((-progress, email) for email, progress in self.progress.items())
+        self.built_at = time.monotonic()
+        self.local_updates = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def upsert(self, email, progress, username=None):
+        self._discard(email)
+        self.progress[email] = progress
+        if username or email not in self.usernames:
+            self.usernames[email] = username or email
+        bisect.insort(self.keys, (-progress, email))
+        self.local_updates += 1
+
+    def update(self, email, progress):
+        """Move an entry already on the board; False (and no change) for an email it does not hold"""
+        if email not in self.progress:
+            return False
+        self.upsert(email, progress)
+        return True
+
+    def remove(self, email):
+        if self._discard(email):
+            self.usernames.pop(email, None)
+            self.local_updates += 1
+
+    def _discard(self, email):
+        if email not in self.progress:
+            return False
+        key = (-self.progress.pop(email), email)
+        del self.keys[bisect.bisect_left(self.keys, key)]
+        return True
+
+    def _row(self, position):
+        progress, email = self.keys[position]
+        return {"username": self.usernames.get(email, email), "progress": -progress, "rank": position + 1}
+
+    def page(self, limit=LEADERBOARD_LIMIT, offset=0):
+        rows = [self._row(i) for i in range(offset, min(offset + limit, len(self.keys)))]
+        return rows, offset + limit < len(self.keys)
+
+    def rank_of(self, email, neighbors=RANK_NEIGHBORS):
+        if email not in self.progress:
+            return None
+        position = bisect.bisect_left(self.keys, (-self.progress[email], email))
+        return {
+            **self._row(position),
+            "above": [self._row(i) for i in range(max(position - neighbors, 0), position)],
+            "below": [self._row(i) for i in range(position + 1, min(position + 1 + neighbors, len(self.keys)))],
+        }
+
+
+class LeaderboardCache:
+    """Per-process ChallengeBoards, patched in place by this worker's progress writes.
+
+    Writes handled by other workers are only seen after a rebuild, so a board older
+    than max_age seconds is reloaded from user_challenges in a background thread
+    while views keep getting the old one; the age of every board is reported as its
+    staleness bound. Only a challenge's first view waits for a load. At most
+    max_boards challenges are kept, least recently viewed first out.
+    """
+
+    def __init__(self, loader, max_age=60, max_boards=50):
+        self.loader = loader
+        self.max_age = max_age
+        self.max_boards = max_boards
+        self._boards = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.last_error = None
+
+    def board(self, challenge_name):
+        with self._lock:
+            board = self._boards.get(challenge_name)
+            if board is not None:
+                self._boards.move_to_end(challenge_name)
+                if time.monotonic() - board.built_at > self.max_age and challenge_name not in self._building:
+                    self._building[challenge_name] = threading.Thread(
+                        target=self._rebuild, args=(challenge_name,), daemon=True
+                    )
+                    self._building[challenge_name].start()
+                return board
+        return self._install(challenge_name, ChallengeBoard(self.loader(challenge_name)))
+
+    def _rebuild(self, challenge_name):
+        try:
+            self._install(challenge_name, ChallengeBoard(self.loader(challenge_name)))
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠ Rebuilding the {challenge_name} leaderboard failed, keeping the old board: {e}")
+        finally:
+            self._building.pop(challenge_name, None)
+
+    def _install(self, challenge_name, board):
+        with self._lock:
+            self._boards[challenge_name] = board
+            self._boards.move_to_end(challenge_name)
+            self.rebuilds += 1
+            while len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+        return board
+
+    def wait(self, timeout=None):
+        """Block until background rebuilds finish (tests use this)"""
+        for thread in list(self._building.values()):
+            thread.join(timeout)
+
+    def query(self, challenge_name, email, limit=LEADERBOARD_LIMIT, offset=0, neighbors=RANK_NEIGHBORS):
+        """(page rows, has_more, caller's rank block, board age in seconds) from one consistent board"""
+        board = self.board(challenge_name)
+        with self._lock:
+            rows, has_more = board.page(limit, offset)
+            me = board.rank_of(email, neighbors)
+            age = round(time.monotonic() - board.built_at, 3)
+        return rows, has_more, me, age
+
+    def has(self, challenge_name):
+        return challenge_name in self._boards
+
+    def add(self, challenge_name, email, progress, username=None):
+        """A join handled by this worker, which knows the username to show"""
+        with self._lock:
+            board = self._boards.get(challenge_name)
+            if board is not None:
+                board.upsert(email, progress, username)
+
+    def set_progress(self, challenge_name, email, progress):
+        """Patch an entry already on the board; one that joined through another worker waits for the rebuild"""
+        with self._lock:
+            board = self._boards.get(challenge_name)
+            if board is not None:
+                board.update(email, progress)
+
+    def remove(self, challenge_name, email):
+        with self._lock:
+            board = self._boards.get(challenge_name)
+            if board is not None:
+                board.remove(email)
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "max_age": self.max_age,
+            "rebuilds": self.rebuilds,
+            "rebuilding": list(self._building),
+            "last_error": self.last_error,
+            "boards": {
+                name: {"entries": len(board), "age_seconds": round(now - board.built_at, 3),
+                       "local_updates": board.local_updates}
+                for name, board in list(self._boards.items())
+            },
+        }
@@ -0,0 +1,151 @@
+"""Database bootstrap: indexes and seed data, applied once per deploy.
+
+    python migrations.py migrate     # apply pending migrations (start.sh runs this before gunicorn)
+    python migrations.py status      # list applied and pending versions
+
+Each migration is idempotent and recorded in the `migrations` collection as
+{_id: version, status, applied_at, duration_ms}. A runner claims a version by
+inserting its document first, so two deploys racing each other never run the
+same migration twice; the API workers themselves never touch the schema.
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+from challenge_catalog import CHALLENGES_VERSION_ID
+from nutrition_rollups import backfill
+
+DEFAULT_CHALLENGES = [
+    {"name": "🏃 10,000 Steps Daily", "description": "Walk 10,000 steps every day", "target": 10000, "unit": "steps"},
+    {"name": "💧 Drink 3L Water Daily", "description": "Drink at least 3 liters of water daily", "target": 3, "unit": "liters"},
+    {"name": "🏋️ Workout 5 Days a Week", "description": "Complete 5 workouts per week", "target": 5, "unit": "sessions"},
+    {"name": "🍎 Eat 5 Servings of Fruits/Veggies", "description": "Eat 5 servings of fruits/veggies daily", "target": 5, "unit": "servings"},
+    {"name": "🛌 Sleep 8 Hours Daily", "description": "Get at least 8 hours of sleep daily", "target": 8, "unit": "hours"}
+]
+
+
+def create_core_indexes(db):
+    db.workout_plans.create_index([("email", 1), ("week", 1)], unique=True)
+    db.workout_plans.create_index("generated_at", expireAfterSeconds=14 * 24 * 3600)
+    db.workout_history.create_index([("email", 1), ("week", 1)], unique=True)
+    db.exercise_counts.create_index([("email", 1), ("exerciseId", 1)], unique=True)
+    db.exercise_counts.create_index([("email", 1), ("count", -1), ("exerciseId", 1)])
+    db.meals.create_index([("user", 1), ("date", 1), ("_id", 1)])
+    db.user_challenges.create_index([("challenge_name", 1), ("progress", -1), ("email", 1)])
+    db.users.create_index("email")
+    db.nutrition_daily.create_index([("user", 1), ("date", 1)], unique=True)
+    db.nutrition_totals.create_index("user", unique=True)
+
+
+def dedupe_challenges(db):
+    """Drop duplicate challenge names (left by workers seeding concurrently), keeping the oldest"""
+    seen, duplicates = set(), []
+    for challenge in db.challenges.find({}, {"name": 1}).sort("_id", 1):
+        if challenge["name"] in seen:
+            duplicates.append(challenge["_id"])
+        seen.add(challenge["name"])
+    if duplicates:
+        db.challenges.delete_many({"_id": {"$in": duplicates}})
+        print(f"🧹 Removed {len(duplicates)} duplicate challenges")
+    db.challenges.create_index("name", unique=True)
+
+
+def seed_default_challenges(db):
+    """Upsert the default challenges by name; existing ones (and edits to them) are left alone"""
+    upserted = 0
+    for challenge in DEFAULT_CHALLENGES:
+        result = db.challenges.update_one({"name": challenge["name"]}, {"$setOnInsert": challenge}, upsert=True)
+        upserted += result.upserted_id is not None
+    if upserted:
+        # workers reload their cached challenge catalog when this moves
+        db.catalog_versions.update_one({"_id": CHALLENGES_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+    print(f"🌱 Seeded {upserted} default challenges")
+
+
+def unique_daily_steps(db):
+    """Keep the most recently updated steps document per (email, date), then enforce uniqueness"""
+    duplicates = list(db.steps.aggregate([
+        {"$sort": {"last_updated": -1, "_id": -1}},
+        {"$group": {"_id": {"email": "$email", "date": "$date"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True))
+    stale = [_id for group in duplicates for _id in group["ids"][1:]]
+    if stale:
+        db.steps.delete_many({"_id": {"$in": stale}})
+        print(f"🧹 Removed {len(stale)} duplicate daily step entries")
+    db.steps.create_index([("email", 1), ("date", 1)], unique=True)
+
+
+# (version, description, apply(db)); append new entries, never edit or reorder applied ones
+MIGRATIONS = [
+    ("0001", "core indexes", create_core_indexes),
+    ("0002", "unique challenge names", dedupe_challenges),
+    ("0003", "seed default challenges", seed_default_challenges),
+    ("0004", "unique daily steps", unique_daily_steps),
+    ("0005", "backfill nutrition rollups", backfill),
+]
+
+
+def applied_versions(db):
+    return {doc["_id"] for doc in db.migrations.find({"status": "applied"}, {"_id": 1})}
+
+
+def migrate(db, migrations=MIGRATIONS):
+    """Apply pending migrations in order; returns the versions applied by this run"""
+    applied = applied_versions(db)
+    ran = []
+    for version, description, apply in migrations:
+        if version in applied:
+            continue
+        try:
+            db.migrations.insert_one({"_id": version, "description": description,
+                                      "status": "running", "started_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            raise RuntimeError(f"Migration {version} is already running (or died mid-run: "
+                               f"delete its `migrations` document and rerun)")
+
+        started = time.perf_counter()
+        try:
+            apply(db)
+        except Exception:
+            db.migrations.delete_one({"_id": version})
+            raise
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        db.migrations.update_one({"_id": version}, {"$set": {
+            "status": "applied", "applied_at": datetime.utcnow(), "duration_ms": duration_ms
+        }})
+        print(f"✅ Applied migration {version} ({description}) in {duration_ms} ms")
+        ran.append(version)
+
+    if not ran:
+        print("✅ Database is up to date")
+    return ran
+
+
+def status(db, migrations=MIGRATIONS):
+    applied = applied_versions(db)
+    for version, description, _ in migrations:
+        print(f"{'applied' if version in applied else 'pending':8} {version} {description}")
+    return [version for version, _, _ in migrations if version not in applied]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database indexes and seed data")
+    parser.add_argument("command", choices=["migrate", "status"])
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI")).HealthFitnessApp
+    if args.command == "migrate":
+        migrate(db)
+    else:
+        status(db)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
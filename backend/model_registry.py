@@ -0,0 +1,94 @@
+import time
+import threading
+from datetime import datetime
+from catalog_manager import sources_version
+from diet_model import CentroidModel
+
+
+def load_model(path):
+    """Centroid .npz artifacts load with numpy alone; anything else is unpickled with joblib"""
+    if path.endswith(".npz"):
+        return CentroidModel.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+class LoadedModel:
+    def __init__(self, name, path, model, version, load_ms):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.version = version
+        self.load_ms = load_ms
+        self.loaded_at = datetime.utcnow()
+
+
+class ModelRegistry:
+    """Models deserialised once per process, keyed by (name, file hash).
+
+    `load()` returns the cached object when the file content is unchanged, so
+    rolling back to an earlier artifact does not unpickle it again. `install()`
+    swaps the active model for a name in one assignment; a prediction that already
+    fetched the old model finishes with it. Prediction latency is kept per name.
+    """
+
+    def __init__(self, loader=load_model):
+        self.loader = loader
+        self._loaded = {}
+        self._active = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, path):
+        version = sources_version([path])
+        key = (name, version)
+        if key not in self._loaded:
+            started = time.perf_counter()
+            model = self.loader(path)
+            self._loaded[key] = LoadedModel(name, path, model, version,
+                                            round((time.perf_counter() - started) * 1000, 2))
+            print(f"✅ Loaded model {name} {version} in {self._loaded[key].load_ms} ms")
+        return self._loaded[key]
+
+    def install(self, entry):
+        previous = self._active.get(entry.name)
+        self._active[entry.name] = entry
+        # keep the outgoing model for a cheap rollback, drop anything older
+        keep = {entry.version, previous.version if previous else None}
+        for key in [k for k in self._loaded if k[0] == entry.name and k[1] not in keep]:
+            del self._loaded[key]
+
+    def get(self, name):
+        entry = self._active.get(name)
+        if entry is None:
+            raise LookupError(f"Model {name} is not loaded")
+        return entry
+
+    def predict(self, name, rows):
+        entry = self.get(name)
+        started = time.perf_counter()
+        predictions = entry.model.predict(rows)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._latency.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_ms"] = elapsed_ms
+        return predictions, entry.version
+
+    def stats(self):
+        result = {}
+        for name, entry in self._active.items():
+            latency = self._latency.get(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            result[name] = {
+                "version": entry.version,
+                "model_version": getattr(entry.model, "metadata", {}).get("model_version"),
+                "loaded_at": entry.loaded_at.isoformat(),
+                "load_ms": entry.load_ms,
+                "predictions": latency["count"],
+                "mean_predict_ms": round(latency["total_ms"] / latency["count"], 4) if latency["count"] else None,
+                "max_predict_ms": round(latency["max_ms"], 4),
+                "last_predict_ms": round(latency.get("last_ms", 0.0), 4),
+            }
+        return result
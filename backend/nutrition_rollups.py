@@ -0,0 +1,140 @@
+"""Per-user nutrition rollups kept next to the raw meals collection.
+
+nutrition_daily has one document per (user, day) and nutrition_totals one per user,
+each holding calories/protein/carbs/fats sums and a meal count. The meal endpoints
+$inc both on every write; readers fetch a handful of rollups instead of summing
+the user's whole meal history.
+
+    python nutrition_rollups.py backfill [--user EMAIL]
+
+rebuilds the rollups from the meals collection (to repair drift if a write died
+between the meal insert and the $inc). The initial backfill runs as a migration
+before the workers start.
+Run it while meal logging is quiet: a meal logged mid-backfill can be counted twice.
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+NUTRITION_KEYS = ["calories", "protein", "carbs", "fats"]
+
+
+def meal_day(date):
+    """YYYY-MM-DD of an ISO meal date"""
+    return date.date().isoformat() if isinstance(date, datetime) else str(date)[:10]
+
+
+def group_rollups(documents):
+    """({(user, day): sums}, {user: sums}) for meal documents; sums include a meal count"""
+    daily, lifetime = {}, {}
+    for doc in documents:
+        nutrition = doc.get("nutrition") or {}
+        day_key = (doc["user"], meal_day(doc.get("date")))
+        if day_key not in daily:
+            daily[day_key] = dict.fromkeys(NUTRITION_KEYS + ["meals"], 0)
+        if doc["user"] not in lifetime:
+            lifetime[doc["user"]] = dict.fromkeys(NUTRITION_KEYS + ["meals"], 0)
+        for bucket in (daily[day_key], lifetime[doc["user"]]):
+            for key in NUTRITION_KEYS:
+                bucket[key] += nutrition.get(key, 0) or 0
+            bucket["meals"] += 1
+    return daily, lifetime
+
+
+def rollup_update(sums, operator, now):
+    if operator == "$inc":
+        return {"$inc": sums, "$set": {"updated_at": now}}
+    return {"$set": {**sums, "updated_at": now}}
+
+
+def rollup_ops(documents, operator="$inc"):
+    """(nutrition_daily ops, nutrition_totals ops) adding ($inc) or overwriting ($set) the documents' sums"""
+    daily, lifetime = group_rollups(documents)
+    now = datetime.utcnow()
+    daily_ops = [
+        UpdateOne({"user": user, "date": day}, rollup_update(sums, operator, now), upsert=True)
+        for (user, day), sums in daily.items()
+    ]
+    total_ops = [
+        UpdateOne({"user": user}, rollup_update(sums, operator, now), upsert=True)
+        for user, sums in lifetime.items()
+    ]
+    return daily_ops, total_ops
+
+
+def record_meals(daily_collection, totals_collection, documents):
+    """Add freshly inserted meal documents to the rollups.
+
+    The $inc upserts create a missing rollup from these documents alone; a user's
+    meals from before rollups existed are added by the backfill (migration 0005 or
+    the CLI), never on the request path.
+    """
+    daily_ops, total_ops = rollup_ops(documents)
+    if not daily_ops:
+        return
+    daily_collection.bulk_write(daily_ops, ordered=False)
+    totals_collection.bulk_write(total_ops, ordered=False)
+
+
+def lifetime_totals(meals_collection, totals_collection, user):
+    """{calories, protein, carbs, fats, meals} for a user, from the rollup when present.
+
+    Users without a rollup yet (not backfilled) are summed server-side in one aggregation.
+    """
+    totals = totals_collection.find_one({"user": user}, {"_id": 0, "user": 0, "updated_at": 0})
+    if totals is None:
+        group = {key: {"$sum": f"$nutrition.{key}"} for key in NUTRITION_KEYS}
+        result = list(meals_collection.aggregate([
+            {"$match": {"user": user}},
+            {"$group": {"_id": None, "meals": {"$sum": 1}, **group}}
+        ]))
+        totals = result[0] if result else dict.fromkeys(NUTRITION_KEYS + ["meals"], 0)
+        totals.pop("_id", None)
+    return {key: totals.get(key, 0) for key in NUTRITION_KEYS + ["meals"]}
+
+
+def backfill(db, user=None):
+    """Recompute rollups from db.meals, one user at a time in (user, date) index order"""
+    query = {"user": user} if user else {}
+    cursor = db.meals.find(query, {"_id": 0, "user": 1, "date": 1, "nutrition": 1}).sort([("user", 1), ("date", 1)])
+
+    users = 0
+    batch = []
+    try:
+        for doc in cursor:
+            if batch and doc["user"] != batch[-1]["user"]:
+                users += write_backfill(db, batch)
+                batch = []
+            batch.append(doc)
+        if batch:
+            users += write_backfill(db, batch)
+    finally:
+        cursor.close()
+    print(f"✅ Backfilled nutrition rollups for {users} users")
+    return users
+
+
+def write_backfill(db, documents):
+    daily_ops, total_ops = rollup_ops(documents, operator="$set")
+    db.nutrition_daily.bulk_write(daily_ops, ordered=False)
+    db.nutrition_totals.bulk_write(total_ops, ordered=False)
+    return len(total_ops)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain per-user nutrition rollups")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--user", help="only backfill this email")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI")).HealthFitnessApp
+    backfill(db, args.user)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
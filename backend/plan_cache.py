@@ -0,0 +1,79 @@
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+
+def iso_week(now=None):
+    year, week, _ = (now or datetime.utcnow()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class WorkoutPlanCache:
+    """Per-process LRU of generated weekly plans.
+
+    Each user has at most one entry, tagged with the profile version and ISO week it
+    was built for; a lookup with any other version or week is a miss. Bumping
+    `profile_version` on a profile write therefore invalidates the plan in every
+    worker, not just the one that handled the write.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+
+    def get(self, email, version, week):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] != version or entry[1] != week:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, email, version, week, plan):
+        size = len(json.dumps(plan, default=str))
+        with self._lock:
+            self._discard(email)
+            self._entries[email] = (version, week, plan, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[3]
+                self.evictions += 1
+
+    def invalidate(self, email):
+        with self._lock:
+            if self._discard(email):
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _discard(self, email):
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+        return entry is not None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "approx_bytes": self.bytes,
+        }
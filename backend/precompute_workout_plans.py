@@ -0,0 +1,161 @@
+"""Nightly job: precompute this week's workout plan for every profile.
+
+    python precompute_workout_plans.py [--chunk-size 500] [--workers 4] [--restart]
+
+Profiles are streamed in _id order and handed to a process pool a chunk at a
+time; each worker memory-maps the exercise artifact once. Progress is
+checkpointed in the `jobs` collection after every chunk, so an interrupted run
+picks up after the last chunk it stored.
+"""
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from exercise_catalog import load_catalog
+from plan_cache import iso_week
+from workout_plans import build_weekly_plan, plan_rng, plan_upsert
+
+PROFILE_FIELDS = {"email": 1, "bmi": 1, "preferred_body_part": 1, "equipment": 1,
+                  "top_exercises": 1, "workout_history": 1, "profile_version": 1}
+
+catalog = None
+
+
+def init_worker(csv_path, artifact_dir):
+    global catalog
+    catalog = load_catalog(csv_path, artifact_dir, rebuild=False)
+
+
+def compute_chunk(profiles, week):
+    """Plans for a chunk of profiles, filtering each intensity/body part/equipment combination once"""
+    candidate_cache = {}
+    plans = []
+    for profile in profiles:
+        version = profile.get("profile_version", 0)
+        plan = build_weekly_plan(
+            catalog, profile,
+            rng=plan_rng(profile["email"], version, week),
+            candidate_cache=candidate_cache
+        )
+        plans.append((profile["email"], version, plan))
+    return plans
+
+
+def chunked(cursor, size):
+    """(profiles, last _id) batches, with _id stripped so profiles pickle cheaply"""
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) == size:
+            yield strip_ids(chunk)
+            chunk = []
+    if chunk:
+        yield strip_ids(chunk)
+
+
+def strip_ids(chunk):
+    last_id = chunk[-1]["_id"]
+    for profile in chunk:
+        profile.pop("_id", None)
+    return chunk, last_id
+
+
+def plan_chunks(chunks, week, pool=None, workers=1):
+    """Computed chunks in cursor order, keeping up to `workers` chunks in flight"""
+    if pool is None:
+        for chunk, last_id in chunks:
+            yield compute_chunk(chunk, week), last_id
+        return
+
+    pending = deque()
+    for chunk, last_id in chunks:
+        pending.append((pool.submit(compute_chunk, chunk, week), last_id))
+        if len(pending) >= workers:
+            future, done_id = pending.popleft()
+            yield future.result(), done_id
+    while pending:
+        future, done_id = pending.popleft()
+        yield future.result(), done_id
+
+
+def run(db, csv_path, artifact_dir, chunk_size=500, workers=os.cpu_count(), restart=False, week=None):
+    week = week or iso_week()
+    job_id = f"precompute-workout-plans:{week}"
+
+    checkpoint = {} if restart else (db.jobs.find_one({"_id": job_id}) or {})
+    if checkpoint.get("finished_at"):
+        print(f"✅ Plans for {week} already precomputed at {checkpoint['finished_at']}; use --restart to redo")
+        return checkpoint
+
+    query = {"bmi": {"$exists": True}, "email": {"$exists": True}}
+    if checkpoint.get("last_id") is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        print(f"↪ Resuming {job_id} after {checkpoint['processed']} profiles")
+    processed = checkpoint.get("processed", 0)
+    db.jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"week": week, "processed": processed, "last_id": checkpoint.get("last_id"),
+                  "started_at": datetime.utcnow(), "finished_at": None}},
+        upsert=True
+    )
+
+    pool = None
+    if workers and workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(csv_path, artifact_dir))
+    else:
+        init_worker(csv_path, artifact_dir)
+
+    cursor = db.profiles.find(query, PROFILE_FIELDS).sort("_id", 1).batch_size(chunk_size)
+    started = time.perf_counter()
+    run_processed = 0
+    try:
+        for plans, last_id in plan_chunks(chunked(cursor, chunk_size), week, pool, workers):
+            if plans:
+                db.workout_plans.bulk_write(
+                    [plan_upsert(email, week, version, plan) for email, version, plan in plans],
+                    ordered=False
+                )
+            processed += len(plans)
+            run_processed += len(plans)
+            db.jobs.update_one({"_id": job_id}, {"$set": {"last_id": last_id, "processed": processed}})
+
+            elapsed = time.perf_counter() - started
+            print(f"📊 {processed} profiles done ({run_processed / elapsed:.0f} users/s)")
+    finally:
+        cursor.close()
+        if pool:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    rate = run_processed / elapsed if elapsed else 0.0
+    db.jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"finished_at": datetime.utcnow(), "users_per_second": rate}}
+    )
+    print(f"✅ Precomputed {run_processed} plans for {week} in {elapsed:.1f}s ({rate:.0f} users/s)")
+    return db.jobs.find_one({"_id": job_id})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute weekly workout plans for all profiles")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--week", help="ISO week to build, e.g. 2025-W14 (default: current week)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    parser.add_argument("--csv", default=os.path.join(os.getcwd(), "fitness_exercises.csv"))
+    parser.add_argument("--artifacts", default=os.getenv("ARTIFACT_DIR", os.path.join(os.getcwd(), "artifacts")))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI")).HealthFitnessApp
+    run(db, args.csv, args.artifacts, args.chunk_size, args.workers, args.restart, args.week)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,14 @@
 #!/bin/bash
 
+# Precompute the exercise artifact and food cache once so the workers only load them
+echo "Building exercise artifact and food cache..."
+python exercise_catalog.py build || exit 1
+python food_catalog.py || exit 1
+
+# Indexes and seed data, once per deploy rather than in every worker
+echo "Applying database migrations..."
+python migrations.py migrate || exit 1
+
 # Start the Flask backend using Gunicorn
 echo "Starting Flask backend..."
-gunicorn -w 4 -b 0.0.0.0:10000 app:app
\ No newline at end of file
+EXERCISE_ARTIFACT_REBUILD=0 gunicorn -w 4 -b 0.0.0.0:10000 app:app
@@ -14,7 +14,7 @@ from unittest.mock import patch, MagicMock
 sys.path.append(str(Path(__file__).parent.parent))
 
 # Now import your Flask app
-from app import app as flask_app
+from app import app as flask_app, FoodState
 
 load_dotenv()
 
@@ -244,10 +244,10 @@ def test_challenges(client, auth_headers):
 
 def test_meal_endpoints(client, auth_headers):
     # Mock food database
-    with patch('app.food_database', {
+    with patch('app.food_state', FoodState.from_database({
         "Apple": {"Calories (kcal)": 52, "Protein (g)": 0.3, "Carbohydrates (g)": 14, "Fats (g)": 0.2},
         "Chicken Breast": {"Calories (kcal)": 165, "Protein (g)": 31, "Carbohydrates (g)": 0, "Fats (g)": 3.6}
-    }):
+    })):
         # Test logging meal
         response = client.post('/api/log-meal', json={
             "meals": {
@@ -357,7 +357,7 @@ def test_meal_plan(client, auth_headers):
     }, headers=auth_headers)
     
     # Mock food model and data
-    with patch('app.food_model', MagicMock()), patch('app.food_df', MagicMock()):
+    with patch('app.food_state', MagicMock()):
         response = client.get('/api/meal-plan', headers=auth_headers)
         assert response.status_code == 200
 
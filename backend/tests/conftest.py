@@ -0,0 +1,24 @@
+import pytest
+
+try:
+    from mongomock.collection import BulkOperationBuilder
+except ImportError:
+    BulkOperationBuilder = None
+
+
+def drop_sort(add):
+    def wrapper(self, *args, sort=None, **kwargs):
+        return add(self, *args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture(autouse=True)
+def mongomock_bulk_write(monkeypatch):
+    """Let mongomock's bulk_write take current pymongo UpdateOne/ReplaceOne objects.
+
+    pymongo >= 4.11 passes a `sort` argument that mongomock's bulk builder does not
+    know; single-document updates ignore it anyway.
+    """
+    if BulkOperationBuilder is not None:
+        monkeypatch.setattr(BulkOperationBuilder, "add_update", drop_sort(BulkOperationBuilder.add_update))
+        monkeypatch.setattr(BulkOperationBuilder, "add_replace", drop_sort(BulkOperationBuilder.add_replace))
@@ -0,0 +1,79 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from catalog_manager import CatalogManager, sources_version
+
+def write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+def make_manager(path, loads, installed):
+    manager = CatalogManager(check_interval=3600)
+    installed.append(path.read_text())
+
+    def load():
+        loads.append(1)
+        text = path.read_text()
+        if text == "broken":
+            raise ValueError("bad catalog")
+        return text
+
+    manager.register("foods", [str(path)], load=load, install=installed.append)
+    return manager
+
+def test_changed_source_is_rebuilt_and_installed_on_next_poll(tmp_path):
+    path = tmp_path / "foods.csv"
+    write(path, "v1", 1_000_000)
+    loads, installed = [], []
+    manager = make_manager(path, loads, installed)
+    first_version = manager.status()["foods"]["version"]
+
+    write(path, "v2", 2_000_000)
+    manager.poll()  # within check_interval: no stat
+    assert loads == []
+
+    manager.poll(force=True)
+    manager.wait()
+    assert installed == ["v1"]  # built in the background, not yet swapped in
+
+    manager.poll()
+    status = manager.status()["foods"]
+    assert installed == ["v1", "v2"]
+    assert status["version"] == sources_version([str(path)]) != first_version
+    assert status["reloads"] == 1
+    assert status["reload_ms"] is not None
+    assert status["reloading"] is False
+
+def test_touched_but_identical_source_is_not_reloaded(tmp_path):
+    path = tmp_path / "foods.csv"
+    write(path, "v1", 1_000_000)
+    loads, installed = [], []
+    manager = make_manager(path, loads, installed)
+
+    os.utime(path, (3_000_000, 3_000_000))
+    manager.poll(force=True)
+    manager.wait()
+    manager.poll()
+
+    assert loads == []
+    assert installed == ["v1"]
+    assert manager.status()["foods"]["reloads"] == 0
+
+def test_failed_reload_keeps_current_version(tmp_path):
+    path = tmp_path / "foods.csv"
+    write(path, "v1", 1_000_000)
+    loads, installed = [], []
+    manager = make_manager(path, loads, installed)
+    version = manager.status()["foods"]["version"]
+
+    write(path, "broken", 2_000_000)
+    manager.poll(force=True)
+    manager.wait()
+    manager.poll(force=True)
+    manager.wait()
+
+    status = manager.status()["foods"]
+    assert installed == ["v1"]
+    assert len(loads) == 1  # not retried until the file changes again
+    assert status["version"] == version
+    assert "bad catalog" in status["last_error"]
@@ -1,9 +1,11 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app as app_module
 from app import app
+from challenge_catalog import ChallengeCatalog
 from flask_jwt_extended import create_access_token
 
 @pytest.fixture
@@ -11,6 +13,12 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def fresh_catalog(monkeypatch):
+    versions = MagicMock()
+    versions.find_one.return_value = None
+    monkeypatch.setattr(app_module, "challenge_catalog", ChallengeCatalog(app_module.challenges_collection, versions))
+
 def auth_header(email="test@example.com"):
     with app.app_context():
         token = create_access_token(identity=email)
@@ -29,15 +37,15 @@ def test_get_challenges(mock_find, client):
     assert isinstance(res.json["challenges"], list)
     assert res.json["challenges"][0]["name"] == "Water Challenge"
 
-@patch("app.challenges_collection.find_one")
+@patch("app.challenges_collection.find")
 @patch("app.user_challenges_collection.find_one")
 @patch("app.user_challenges_collection.insert_one")
 def test_join_challenge(mock_insert, mock_user_find, mock_chal_find, client):
-    mock_chal_find.return_value = {
+    mock_chal_find.return_value = [{
         "name": "Water Challenge",
         "target": 30,
         "unit": "days"
-    }
+    }]
     mock_user_find.return_value = None  
 
     res = client.post(
@@ -49,14 +57,14 @@ def test_join_challenge(mock_insert, mock_user_find, mock_chal_find, client):
     assert res.json["message"] == "Joined challenge: Water Challenge"
 
 
-@patch("app.challenges_collection.find_one")
+@patch("app.challenges_collection.find")
 @patch("app.user_challenges_collection.find_one")
 def test_join_challenge_already_joined(mock_user_find, mock_chal_find, client):
-    mock_chal_find.return_value = {
+    mock_chal_find.return_value = [{
         "name": "Water Challenge",
         "target": 30,
         "unit": "days"
-    }
+    }]
     mock_user_find.return_value = {
         "email": "test@example.com",
         "challenge_name": "Water Challenge"
@@ -86,23 +94,15 @@ def test_get_user_challenges(mock_find, client):
     assert res.json["challenges"][0]["progress"] == 10
 
 @patch("app.get_jwt_identity")
-@patch("app.user_challenges_collection.find_one")
-@patch("app.user_challenges_collection.update_one")
-@patch("app.challenges_collection.find_one") 
-def test_update_challenge_progress(mock_challenge_find, mock_update, mock_user_find, mock_identity, client):
+@patch("app.user_challenges_collection.find_one_and_update")
+def test_update_challenge_progress(mock_inc, mock_identity, client):
 
     mock_identity.return_value = "test@example.com"
-    mock_challenge_find.return_value = {
-        "name": "Water Challenge",
-        "target": 30
-    }
-    mock_user_find.return_value = {
-        "email": "test@example.com",
+    mock_inc.return_value = {
         "challenge_name": "Water Challenge",
-        "progress": 10,
+        "progress": 15,
         "target": 30
     }
-    mock_update.return_value.modified_count = 1
 
     res = client.post(
         "/api/update-challenge-progress",
@@ -112,6 +112,71 @@ def test_update_challenge_progress(mock_challenge_find, mock_update, mock_user_f
 
     print("Response JSON:", res.json)
     assert res.status_code == 200
+    assert res.json["new_progress"] == 15
+    assert mock_inc.call_args.args[1] == {"$inc": {"progress": 5}}
+
+@pytest.fixture
+def challenge_db(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().HealthFitnessApp
+    db.challenges.insert_many([
+        {"name": "Water Challenge", "target": 30, "unit": "glasses"},
+        {"name": "Steps Challenge", "target": 10000, "unit": "steps"},
+    ])
+    db.user_challenges.insert_many([
+        {"email": "test@example.com", "challenge_name": "Water Challenge", "progress": 25, "target": 30},
+        {"email": "test@example.com", "challenge_name": "Steps Challenge", "progress": 0, "target": 10000},
+    ])
+    monkeypatch.setattr(app_module, "challenges_collection", db.challenges)
+    monkeypatch.setattr(app_module, "user_challenges_collection", db.user_challenges)
+    monkeypatch.setattr(app_module, "achievements_collection", db.achievements)
+    monkeypatch.setattr(app_module, "challenge_catalog", ChallengeCatalog(db.challenges, db.catalog_versions))
+    return db
+
+def test_update_challenge_progress_awards_badge_once(client, challenge_db):
+    def update(amount):
+        return client.post("/api/update-challenge-progress",
+                           json={"challenge_name": "Water Challenge", "progress": amount}, headers=auth_header())
+
+    first, second = update(5), update(3)
+
+    assert first.json["badge"] == "🏆 Water Challenge Champion"
+    assert "badge" not in second.json
+    assert second.json["new_progress"] == 33
+    assert challenge_db.achievements.count_documents({"user": "test@example.com"}) == 1
+    assert challenge_db.user_challenges.find_one({"challenge_name": "Water Challenge"})["completed"] is True
+
+def test_update_challenge_progress_not_joined_or_missing(client, challenge_db):
+    res = client.post("/api/update-challenge-progress", json={"challenge_name": "Water Challenge", "progress": 1},
+                      headers=auth_header("other@example.com"))
+    assert res.status_code == 403
+    res = client.post("/api/update-challenge-progress", json={"challenge_name": "Nope", "progress": 1},
+                      headers=auth_header())
+    assert res.status_code == 404
+    res = client.post("/api/update-challenge-progress", json={"challenge_name": "Water Challenge", "progress": "1"},
+                      headers=auth_header())
+    assert res.status_code == 400
+
+def test_update_challenges_progress_in_one_batch(client, challenge_db):
+    res = client.post("/api/update-challenges-progress", json={"updates": [
+        {"challenge_name": "Water Challenge", "progress": 3},
+        {"challenge_name": "Steps Challenge", "progress": 4000},
+        {"challenge_name": "Water Challenge", "progress": 2},
+        {"challenge_name": "Sleep Challenge", "progress": 8},
+    ]}, headers=auth_header())
+
+    assert res.status_code == 200
+    assert res.json["progress"] == {"Water Challenge": 30, "Steps Challenge": 4000}
+    assert res.json["completed"] == ["Water Challenge"]
+    assert res.json["not_joined"] == ["Sleep Challenge"]
+    assert challenge_db.achievements.count_documents({}) == 1
+
+def test_update_challenges_progress_rejects_bad_batches(client, challenge_db):
+    assert client.post("/api/update-challenges-progress", json={"updates": []}, headers=auth_header()).status_code == 400
+    res = client.post("/api/update-challenges-progress", json={"updates": [{"challenge_name": "Water Challenge"}]},
+                      headers=auth_header())
+    assert res.status_code == 400
+    assert challenge_db.user_challenges.find_one({"challenge_name": "Water Challenge"})["progress"] == 25
 
 @patch("app.user_challenges_collection.find_one")
 @patch("app.user_challenges_collection.delete_one")
@@ -128,3 +193,42 @@ def test_leave_challenge(mock_delete, mock_find, client):
     print("Response JSON:", res.json)
     assert res.status_code == 200
 
+
+def test_challenge_catalog_reloads_only_on_version_bump(challenge_db):
+    catalog = app_module.challenge_catalog
+    catalog.check_interval = 0
+    assert catalog.get("Water Challenge")["target"] == 30
+    assert catalog.get("Steps Challenge")["unit"] == "steps"
+    assert catalog.reloads == 1
+
+    # another worker's write is only picked up once the version moves
+    challenge_db.challenges.update_one({"name": "Water Challenge"}, {"$set": {"target": 40}})
+    assert catalog.get("Water Challenge")["target"] == 30
+    challenge_db.catalog_versions.update_one({"_id": "challenges"}, {"$inc": {"version": 1}}, upsert=True)
+    assert catalog.get("Water Challenge")["target"] == 40
+    assert catalog.reloads == 2
+
+def test_challenge_catalog_skips_db_between_checks(challenge_db, monkeypatch):
+    catalog = ChallengeCatalog(challenge_db.challenges, challenge_db.catalog_versions, check_interval=60)
+    catalog.all()
+    monkeypatch.setattr(challenge_db.catalog_versions, "find_one", MagicMock(side_effect=AssertionError))
+    monkeypatch.setattr(challenge_db.challenges, "find", MagicMock(side_effect=AssertionError))
+    assert [c["name"] for c in catalog.all()] == ["Water Challenge", "Steps Challenge"]
+    assert catalog.get("Steps Challenge")["target"] == 10000
+
+def test_add_challenge_bumps_version(client, challenge_db):
+    app_module.challenge_catalog.all()
+    res = client.post("/api/add-challenge", json={
+        "name": "Sleep Challenge", "description": "Sleep 8 hours", "target": 8, "unit": "hours"
+    }, headers=auth_header())
+
+    assert res.status_code == 201
+    assert challenge_db.catalog_versions.find_one({"_id": "challenges"})["version"] == 1
+    assert app_module.challenge_catalog.status()["version"] == 1
+    names = [c["name"] for c in client.get("/api/get-challenges", headers=auth_header()).json["challenges"]]
+    assert "Sleep Challenge" in names
+
+    res = client.post("/api/add-challenge", json={
+        "name": "Sleep Challenge", "description": "again", "target": 8, "unit": "hours"
+    }, headers=auth_header())
+    assert res.status_code == 400
@@ -0,0 +1,150 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from exercise_catalog import (
+    build_tag_matrix, build_neighbor_index, similar_exercises,
+    build_artifact, load_catalog, artifact_path, ExerciseCatalog
+)
+
+@pytest.fixture
+def mock_exercises_df():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "bodyPart": ["upper arms", "upper legs", "upper arms", "chest", "upper legs"],
+        "equipment": ["barbell", "body weight", "dumbbell", "barbell", "barbell"],
+        "target": ["biceps", "quads", "biceps", "pectorals", "glutes"],
+        "name": ["barbell curl", "squat", "dumbbell curl", "bench press", "barbell lunge"],
+    })
+
+def test_build_neighbor_index_shape_and_dtype(mock_exercises_df):
+    tag_matrix = build_tag_matrix(mock_exercises_df)
+    ids, scores = build_neighbor_index(tag_matrix, k=3)
+
+    assert ids.shape == (5, 3)
+    assert scores.shape == (5, 3)
+    assert ids.dtype == np.int32
+    assert scores.dtype == np.float32
+
+def test_build_neighbor_index_matches_dense_similarity(mock_exercises_df):
+    tag_matrix = build_tag_matrix(mock_exercises_df)
+    ids, scores = build_neighbor_index(tag_matrix, k=4, chunk_size=2)
+
+    dense = (tag_matrix @ tag_matrix.T).toarray()
+    for row in range(len(mock_exercises_df)):
+        assert row not in ids[row]
+        assert np.all(np.diff(scores[row]) <= 0)
+        np.testing.assert_allclose(scores[row], dense[row, ids[row]], rtol=1e-6)
+        expected = np.sort(np.delete(dense[row], row))[::-1]
+        np.testing.assert_allclose(scores[row], expected, rtol=1e-6)
+
+def test_similar_exercises_returns_closest(mock_exercises_df):
+    tag_matrix = build_tag_matrix(mock_exercises_df)
+    ids, _ = build_neighbor_index(tag_matrix)
+
+    # the two biceps curls share "upper arms ... biceps"
+    assert similar_exercises(ids, 0, 1).tolist() == [2]
+    assert len(similar_exercises(ids, 0, 3)) == 3
+
+def test_build_neighbor_index_single_row():
+    df = pd.DataFrame({"bodyPart": ["chest"], "equipment": ["barbell"], "target": ["pectorals"]})
+    ids, scores = build_neighbor_index(build_tag_matrix(df))
+    assert ids.shape == (1, 0)
+    assert scores.shape == (1, 0)
+
+def test_catalog_lookup_by_id(mock_exercises_df):
+    catalog = ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+    assert catalog.position(3) == 2
+    assert catalog.position("0004") == 3
+    assert catalog.position(42) is None
+    assert catalog.position(None) is None
+    assert catalog.lookup([5, 42, 1, "abc"]) == ([4, 0], [42, "abc"])
+
+def test_catalog_rejects_duplicate_ids(mock_exercises_df):
+    mock_exercises_df.loc[1, "id"] = 1
+    with pytest.raises(ValueError):
+        ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+def test_candidate_mask_matches_dataframe_filters(mock_exercises_df):
+    catalog = ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+    mask = catalog.candidate_mask("intermediate", "all", ["barbell"])
+    assert np.flatnonzero(mask).tolist() == [0, 3, 4]
+
+    mask = catalog.candidate_mask("low-impact", "all", ["barbell", "body weight"])
+    assert np.flatnonzero(mask).tolist() == [1]
+
+    mask = catalog.candidate_mask("intermediate", "upper legs", "barbell")
+    assert np.flatnonzero(mask).tolist() == [4]
+
+    assert not catalog.candidate_mask("intermediate", "neck", ["barbell"]).any()
+    assert not catalog.candidate_mask("intermediate", "all", ["kettlebell"]).any()
+    assert np.flatnonzero(catalog.group_masks["arms"]).tolist() == [0, 2]
+    assert np.flatnonzero(catalog.group_masks["legs"]).tolist() == [1, 4]
+
+def test_candidate_mask_beginner_excludes_advanced_names(mock_exercises_df):
+    mock_exercises_df.loc[3, "name"] = "advanced bench press"
+    catalog = ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+    mask = catalog.candidate_mask("beginner", "all", ["barbell"])
+    assert np.flatnonzero(mask).tolist() == [0, 4]
+
+def test_catalog_records_are_json_ready(mock_exercises_df):
+    catalog = ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+    record = catalog.records[0]
+    assert record["id"] == 1 and type(record["id"]) is int
+    assert record["gifUrl"] == "https://d205bpvrqc9yn1.cloudfront.net/0001.gif"
+    assert record["tags"] == "upper arms barbell biceps"
+
+def test_sample_records(mock_exercises_df):
+    catalog = ExerciseCatalog.from_dataframe(mock_exercises_df)
+
+    sampled = catalog.sample_records(3)
+    assert len(sampled) == 3
+    assert len({r["id"] for r in sampled}) == 3
+    assert len(catalog.sample_records(10)) == 5
+
+    sampled = catalog.sample_records(7, np.array([1, 4]))
+    assert sorted(r["id"] for r in sampled) == [2, 5]
+    assert catalog.sample_records(7, np.array([], dtype=int)) == []
+
+@pytest.fixture
+def exercises_csv(tmp_path, mock_exercises_df):
+    path = tmp_path / "fitness_exercises.csv"
+    mock_exercises_df.assign(gifUrl="").to_csv(path, index=False)
+    return path
+
+def test_build_artifact_round_trip(tmp_path, exercises_csv, mock_exercises_df):
+    artifact_root = tmp_path / "artifacts"
+    path = build_artifact(str(exercises_csv), str(artifact_root), k=3)
+    assert os.path.isdir(path)
+
+    catalog = load_catalog(str(exercises_csv), str(artifact_root), rebuild=False)
+    assert catalog.version["rows"] == 5
+    assert catalog.df["id"].tolist() == [1, 2, 3, 4, 5]
+    assert catalog.df["name"].tolist() == mock_exercises_df["name"].tolist()
+    assert isinstance(catalog.neighbor_ids, np.memmap)
+    assert not catalog.neighbor_ids.flags.writeable
+    assert catalog.tag_matrix.shape[0] == 5
+
+    expected_ids, _ = build_neighbor_index(build_tag_matrix(mock_exercises_df), k=3)
+    np.testing.assert_array_equal(catalog.neighbor_ids, expected_ids)
+
+def test_load_catalog_rebuilds_when_csv_changes(tmp_path, exercises_csv, mock_exercises_df):
+    artifact_root = str(tmp_path / "artifacts")
+    first = load_catalog(str(exercises_csv), artifact_root)
+
+    mock_exercises_df.iloc[:3].assign(gifUrl="").to_csv(exercises_csv, index=False)
+    with pytest.raises(RuntimeError):
+        load_catalog(str(exercises_csv), artifact_root, rebuild=False)
+
+    second = load_catalog(str(exercises_csv), artifact_root)
+    assert first.version["rows"] == 5
+    assert second.version["rows"] == 3
+    assert second.version["source_sha1"] != first.version["source_sha1"]
+    assert os.path.isdir(artifact_path(str(exercises_csv), artifact_root))
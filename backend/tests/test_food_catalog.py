@@ -0,0 +1,156 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app as app_module
+from app import app
+from flask_jwt_extended import create_access_token
+from food_catalog import FoodCatalog, NutrientNeighbors
+
+FOODS = {
+    "Chicken Breast": {"Calories (kcal)": 165, "Protein (g)": 31, "Carbohydrates (g)": 0, "Fats (g)": 3.6},
+    "chickpeas": {"Calories (kcal)": 164, "Protein (g)": 8.9, "Carbohydrates (g)": 27, "Fats (g)": 2.6},
+    "Rice": {"Calories (kcal)": 130, "Protein (g)": 2.5, "Carbohydrates (g)": 28, "Fats (g)": 0.3},
+    "Chia Seeds": {"Calories (kcal)": 486, "Protein (g)": 17, "Carbohydrates (g)": 42, "Fats (g)": 31},
+}
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def foods(monkeypatch):
+    monkeypatch.setattr(app_module, "food_state", app_module.FoodState.from_database(FOODS))
+
+def auth_header(email="test@example.com"):
+    with app.app_context():
+        token = create_access_token(identity=email)
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+
+def test_food_catalog_prefix_search():
+    catalog = FoodCatalog.from_dict(FOODS)
+
+    assert catalog.search("chi") == (["Chia Seeds", "Chicken Breast", "chickpeas"], 3)
+    assert catalog.search("  CHICK ") == (["Chicken Breast", "chickpeas"], 2)
+    assert catalog.search("chi", limit=1, offset=1) == (["Chicken Breast"], 3)
+    assert catalog.search("chi", offset=5) == ([], 3)
+    assert catalog.search("x") == ([], 0)
+    assert catalog.search("")[1] == 4
+
+def test_food_catalog_resolve():
+    catalog = FoodCatalog.from_dict(FOODS)
+
+    assert catalog.names[catalog.resolve("chicken   breast")] == "Chicken Breast"
+    assert catalog.names[catalog.resolve(" RICE ")] == "Rice"
+    assert catalog.resolve("Pizza") is None
+    assert catalog.resolve(None) is None
+
+def test_food_catalog_totals():
+    catalog = FoodCatalog.from_dict(FOODS)
+    ids, unmatched = catalog.resolve_many(["rice", "Rice", "pizza", "CHIA seeds"])
+
+    assert unmatched == ["pizza"]
+    sums = catalog.totals([ids, np.array([], dtype=np.int32), ids[:1]])
+    assert sums.shape == (3, 4)
+    np.testing.assert_allclose(sums[0], [746, 22, 98, 31.6])
+    np.testing.assert_allclose(sums[1], 0)
+    np.testing.assert_allclose(sums[2], [130, 2.5, 28, 0.3])
+
+def test_nutrient_neighbors_exact_and_sorted():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 100, (50, 4))
+    queries = rng.uniform(0, 100, (7, 4))
+
+    distances, indices = NutrientNeighbors(n_neighbors=5).fit(points).kneighbors(queries)
+
+    full = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+    np.testing.assert_array_equal(indices, full.argsort(axis=1)[:, :5])
+    np.testing.assert_allclose(distances, np.sort(full, axis=1)[:, :5])
+
+def test_get_food_items_prefix(client, foods):
+    res = client.get("/api/get-food-items?prefix=Chi&limit=2")
+    assert res.status_code == 200
+    assert res.json == {"food_items": ["Chia Seeds", "Chicken Breast"], "total": 3, "limit": 2, "offset": 0}
+
+    res = client.get("/api/get-food-items?prefix=chi&offset=2")
+    assert res.json["food_items"] == ["chickpeas"]
+
+    assert client.get("/api/get-food-items?limit=abc").status_code == 400
+
+def test_get_food_items_without_params_lists_all(client, foods):
+    res = client.get("/api/get-food-items")
+    assert res.status_code == 200
+    assert res.json["food_items"] == list(FOODS)
+
+@patch("app.record_meals")
+@patch("app.meal_collection.insert_one")
+def test_log_meal_resolves_names_loosely(mock_insert, mock_rollups, client, foods):
+    res = client.post(
+        "/api/log-meal",
+        json={"meals": {"lunch": ["chicken breast", " rice"], "dinner": "Pizza"}},
+        headers=auth_header()
+    )
+
+    assert res.status_code == 201
+    assert res.json["total_nutrition"]["calories"] == 295
+    assert res.json["unmatched_items"] == ["Pizza"]
+    mock_insert.assert_called_once()
+    assert mock_rollups.call_args[0][2] == [mock_insert.call_args[0][0]]
+
+@patch("app.record_meals")
+@patch("app.meal_collection.insert_many")
+def test_log_meals_batch_single_insert(mock_insert_many, mock_rollups, client, foods):
+    res = client.post(
+        "/api/log-meals",
+        json={"entries": [
+            {"meals": {"breakfast": ["Chia Seeds"]}, "date": "2025-04-01T08:00:00"},
+            {"meals": {"lunch": ["rice", "Rice"], "dinner": ["Pizza"]}, "date": "2025-04-02T12:30:00"},
+        ]},
+        headers=auth_header()
+    )
+
+    assert res.status_code == 201
+    logged = res.json["logged"]
+    assert [entry["total_nutrition"]["calories"] for entry in logged] == [486, 260]
+    assert logged[1]["unmatched_items"] == ["Pizza"]
+
+    mock_insert_many.assert_called_once()
+    documents = mock_insert_many.call_args[0][0]
+    assert [doc["date"] for doc in documents] == ["2025-04-01T08:00:00", "2025-04-02T12:30:00"]
+    assert all(doc["user"] == "test@example.com" for doc in documents)
+    assert mock_rollups.call_args[0][2] == documents
+
+@patch("app.record_meals")
+@patch("app.meal_collection.insert_many")
+def test_log_meals_batch_normalizes_dates(mock_insert_many, mock_rollups, client, foods):
+    res = client.post(
+        "/api/log-meals",
+        json={"entries": [
+            {"meals": {"lunch": ["Rice"]}, "date": date}
+            for date in ["20250401", "2025-W14-2", "2025-04-01", "2025-04-01T10:00:00+02:00"]
+        ]},
+        headers=auth_header()
+    )
+
+    assert res.status_code == 201
+    documents = mock_insert_many.call_args[0][0]
+    assert [doc["date"] for doc in documents] == [
+        "2025-04-01T00:00:00", "2025-04-01T00:00:00", "2025-04-01T00:00:00", "2025-04-01T08:00:00"
+    ]
+
+@patch("app.meal_collection.insert_many")
+def test_log_meals_batch_rejects_invalid_entries(mock_insert_many, client, foods):
+    assert client.post("/api/log-meals", json={"entries": []}, headers=auth_header()).status_code == 400
+    res = client.post(
+        "/api/log-meals",
+        json={"entries": [{"meals": {"lunch": ["Rice"]}, "date": "yesterday"}]},
+        headers=auth_header()
+    )
+    assert res.status_code == 400
+    mock_insert_many.assert_not_called()
@@ -0,0 +1,81 @@
+import json
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app as app_module
+from app import app
+from flask_jwt_extended import create_access_token
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def meals(monkeypatch):
+    db = mongomock.MongoClient().HealthFitnessApp
+    dates = ["2025-04-01T08:00:00", "2025-04-01T08:00:00", "2025-04-02T12:00:00",
+             "2025-04-03T19:30:00", "2025-04-05T07:15:00"]
+    db.meals.insert_many([
+        {"user": "test@example.com", "date": date, "meals": {"lunch": [f"food {i}"]},
+         "nutrition": {"calories": 100, "protein": 0, "carbs": 0, "fats": 0}}
+        for i, date in enumerate(dates)
+    ])
+    db.meals.insert_one({"user": "other@example.com", "date": "2025-04-04T00:00:00", "meals": {}})
+    monkeypatch.setattr(app_module, "meal_collection", db.meals)
+    monkeypatch.setattr(app_module, "nutrition_totals_collection", db.nutrition_totals)
+    return db.meals
+
+def auth_header(email="test@example.com"):
+    with app.app_context():
+        token = create_access_token(identity=email)
+    return {"Authorization": f"Bearer {token}"}
+
+def test_get_meals_paginates_newest_first(client, meals):
+    seen = []
+    before = None
+    while True:
+        url = "/api/get-meals?limit=2" + (f"&before={before}" if before else "")
+        res = client.get(url, headers=auth_header())
+        assert res.status_code == 200
+        assert len(res.json["meals"]) <= 2
+        seen.extend(meal["meals"]["lunch"][0] for meal in res.json["meals"])
+        before = res.json["next_before"]
+        if before is None:
+            break
+
+    # the two meals sharing a timestamp are neither skipped nor repeated
+    assert seen == ["food 4", "food 3", "food 2", "food 1", "food 0"]
+
+def test_get_meals_date_range(client, meals):
+    res = client.get("/api/get-meals?from=2025-04-02&to=2025-04-03", headers=auth_header())
+    assert res.status_code == 200
+    assert [meal["date"] for meal in res.json["meals"]] == ["2025-04-03T19:30:00", "2025-04-02T12:00:00"]
+    assert res.json["next_before"] is None
+    assert res.json["overall_nutrition"]["calories"] == 500
+
+def test_get_meals_rejects_bad_params(client, meals):
+    assert client.get("/api/get-meals?limit=0", headers=auth_header()).status_code == 400
+    assert client.get("/api/get-meals?from=yesterday", headers=auth_header()).status_code == 400
+    assert client.get("/api/get-meals?before=2025-04-01|nope", headers=auth_header()).status_code == 400
+
+def test_get_meals_streams_ndjson(client, meals):
+    res = client.get("/api/get-meals?format=ndjson&from=2025-04-02", headers=auth_header())
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert [line["date"] for line in lines] == ["2025-04-05T07:15:00", "2025-04-03T19:30:00", "2025-04-02T12:00:00"]
+    assert "_id" not in lines[0]
+
+def test_get_meals_without_params_returns_every_meal(client, meals, monkeypatch):
+    # MealSummary computes its stats from one unparameterised call
+    monkeypatch.setattr(app_module, "MEALS_PAGE_LIMIT", 2)
+    res = client.get("/api/get-meals", headers=auth_header())
+    assert res.status_code == 200
+    assert len(res.json["meals"]) == 5
+    assert res.json["next_before"] is None
+    assert res.json["overall_nutrition"]["calories"] == 500
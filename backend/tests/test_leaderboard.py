@@ -0,0 +1,195 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app as app_module
+from leaderboard import ChallengeBoard, LeaderboardCache
+from challenge_catalog import ChallengeCatalog
+from app import app
+from flask_jwt_extended import create_access_token
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    app_module.leaderboard_cache.clear()
+    yield
+    app_module.leaderboard_cache.clear()
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().HealthFitnessApp
+    db.user_challenges.insert_many([
+        {"email": "a@example.com", "challenge_name": "Steps", "progress": 5},
+        {"email": "b@example.com", "challenge_name": "Steps", "progress": 9},
+        {"email": "c@example.com", "challenge_name": "Steps", "progress": 9},
+        {"email": "d@example.com", "challenge_name": "Water", "progress": 50},
+    ])
+    db.users.insert_many([
+        {"email": "a@example.com", "username": "alice", "password": "hash"},
+        {"email": "b@example.com", "password": "hash"},
+    ])
+    monkeypatch.setattr(app_module, "user_challenges_collection", db.user_challenges)
+    db.challenges.insert_one({"name": "Steps", "target": 100, "unit": "steps"})
+    monkeypatch.setattr(app_module, "users_collection", db.users)
+    monkeypatch.setattr(app_module, "challenge_catalog", ChallengeCatalog(db.challenges, db.catalog_versions))
+    return db
+
+def auth_header(email="a@example.com"):
+    with app.app_context():
+        token = create_access_token(identity=email)
+    return {"Authorization": f"Bearer {token}"}
+
+def test_leaderboard_sorted_with_usernames_in_one_query(client, db, monkeypatch):
+    def no_lookups(*args, **kwargs):
+        raise AssertionError("usernames should be joined by the aggregation")
+    monkeypatch.setattr(db.users, "find_one", no_lookups)
+
+    res = client.get("/api/get-leaderboard/Steps", headers=auth_header())
+
+    assert res.status_code == 200
+    assert res.json["leaderboard"] == [
+        {"username": "b@example.com", "progress": 9, "rank": 1},
+        {"username": "c@example.com", "progress": 9, "rank": 2},
+        {"username": "alice", "progress": 5, "rank": 3},
+    ]
+
+def test_leaderboard_empty_challenge(client, db):
+    res = client.get("/api/get-leaderboard/Sleep", headers=auth_header())
+    assert res.status_code == 200
+    assert res.json["leaderboard"] == []
+
+@pytest.fixture
+def big_challenge(db):
+    db.user_challenges.insert_many([
+        {"email": f"u{i:03d}@example.com", "challenge_name": "Big", "progress": i // 2}
+        for i in range(40)
+    ])
+    return db
+
+def test_leaderboard_pagination(client, big_challenge):
+    first = client.get("/api/get-leaderboard/Big?limit=15", headers=auth_header()).json
+    second = client.get("/api/get-leaderboard/Big?limit=15&offset=15", headers=auth_header()).json
+    last = client.get("/api/get-leaderboard/Big?limit=15&offset=30", headers=auth_header()).json
+
+    assert (len(first["leaderboard"]), first["has_more"]) == (15, True)
+    assert last["has_more"] is False
+    rows = first["leaderboard"] + second["leaderboard"] + last["leaderboard"]
+    assert [row["rank"] for row in rows] == list(range(1, 41))
+    assert rows[0] == {"username": "u038@example.com", "progress": 19, "rank": 1}
+    assert rows[1]["username"] == "u039@example.com"
+
+def test_leaderboard_me_block(client, big_challenge):
+    res = client.get("/api/get-leaderboard/Big?limit=5", headers=auth_header("u020@example.com"))
+    me = res.json["me"]
+
+    # 18 entries have more progress than 10, and u021 ties but sorts after u020
+    assert (me["rank"], me["progress"], me["username"]) == (19, 10, "u020@example.com")
+    assert [(row["rank"], row["username"]) for row in me["above"]] == [(17, "u022@example.com"), (18, "u023@example.com")]
+    assert [(row["rank"], row["username"]) for row in me["below"]] == [(20, "u021@example.com"), (21, "u018@example.com")]
+
+    # consistent with the paged ranks
+    page = client.get("/api/get-leaderboard/Big?limit=3&offset=17", headers=auth_header()).json["leaderboard"]
+    assert [row["username"] for row in page] == ["u023@example.com", "u020@example.com", "u021@example.com"]
+
+def test_leaderboard_me_absent_and_bad_params(client, big_challenge):
+    res = client.get("/api/get-leaderboard/Big", headers=auth_header("nobody@example.com"))
+    assert res.json["me"] is None
+    assert client.get("/api/get-leaderboard/Big?limit=0", headers=auth_header()).status_code == 400
+    assert client.get("/api/get-leaderboard/Big?offset=-1", headers=auth_header()).status_code == 400
+
+def test_challenge_board_ranks_and_moves():
+    board = ChallengeBoard([
+        {"email": "a", "progress": 5, "username": "alice"},
+        {"email": "b", "progress": 9},
+        {"email": "c", "progress": 9},
+    ])
+    assert [row["username"] for row in board.page()[0]] == ["b", "c", "alice"]
+
+    board.upsert("a", 12)
+    board.upsert("d", 9, "dave")
+    board.remove("b")
+    rows, has_more = board.page(limit=2)
+    assert rows == [{"username": "alice", "progress": 12, "rank": 1}, {"username": "c", "progress": 9, "rank": 2}]
+    assert has_more is True
+    me = board.rank_of("d", neighbors=1)
+    assert (me["rank"], me["above"][0]["username"], me["below"]) == (3, "c", [])
+    assert board.rank_of("b") is None
+    assert board.local_updates == 3
+
+def test_leaderboard_served_from_cache_and_patched_by_writes(client, db, monkeypatch):
+    monkeypatch.setattr(app_module.leaderboard_cache, "max_age", 60)
+    client.get("/api/get-leaderboard/Steps", headers=auth_header())
+    rebuilds = app_module.leaderboard_cache.rebuilds
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("a cached board should not hit user_challenges")
+    monkeypatch.setattr(db.user_challenges, "aggregate", no_reads)
+
+    res = client.post("/api/update-challenge-progress", json={"challenge_name": "Steps", "progress": 10},
+                      headers=auth_header())
+    assert res.status_code == 200
+    res = client.post("/api/leave-challenge", json={"challenge_name": "Steps"}, headers=auth_header("b@example.com"))
+    assert res.status_code == 200
+
+    body = client.get("/api/get-leaderboard/Steps", headers=auth_header()).json
+    assert body["leaderboard"] == [
+        {"username": "alice", "progress": 15, "rank": 1},
+        {"username": "c@example.com", "progress": 9, "rank": 2},
+    ]
+    assert body["me"]["rank"] == 1
+    assert body["cache_age_seconds"] >= 0
+    assert app_module.leaderboard_cache.rebuilds == rebuilds
+
+def test_leaderboard_cache_rebuilds_after_max_age_in_the_background(db):
+    loads = []
+    cache = LeaderboardCache(lambda name: loads.append(name) or [{"email": "a", "progress": len(loads)}], max_age=60)
+
+    assert cache.query("Steps", "a")[0][0]["progress"] == 1
+    assert cache.query("Steps", "a")[0][0]["progress"] == 1
+    cache._boards["Steps"].built_at -= 61
+    # the stale board is served while its replacement loads
+    assert cache.query("Steps", "a")[3] > 60
+    cache.wait()
+    assert cache.query("Steps", "a")[0][0]["progress"] == 2
+    assert cache.stats()["rebuilds"] == 2
+    assert cache.stats()["boards"]["Steps"]["entries"] == 1
+
+def test_failed_background_rebuild_keeps_the_old_board():
+    def loader(name):
+        if loader.calls:
+            raise RuntimeError("primary stepped down")
+        loader.calls += 1
+        return [{"email": "a", "progress": 3}]
+    loader.calls = 0
+    cache = LeaderboardCache(loader, max_age=60)
+
+    cache.query("Steps", "a")
+    cache._boards["Steps"].built_at -= 61
+    cache.query("Steps", "a")
+    cache.wait()
+    assert cache.query("Steps", "a")[0] == [{"username": "a", "progress": 3, "rank": 1}]
+    assert "primary stepped down" in cache.stats()["last_error"]
+
+def test_progress_from_a_user_joined_elsewhere_waits_for_the_rebuild(client, db, monkeypatch):
+    monkeypatch.setattr(app_module.leaderboard_cache, "max_age", 60)
+    client.get("/api/get-leaderboard/Steps", headers=auth_header())
+    # joined through another worker: in MongoDB, not on this worker's board
+    db.user_challenges.insert_one({"email": "e@example.com", "challenge_name": "Steps", "progress": 0})
+    db.users.insert_one({"email": "e@example.com", "username": "erin", "password": "hash"})
+
+    res = client.post("/api/update-challenge-progress", json={"challenge_name": "Steps", "progress": 20},
+                      headers=auth_header("e@example.com"))
+    assert res.status_code == 200
+
+    rows = client.get("/api/get-leaderboard/Steps", headers=auth_header()).json["leaderboard"]
+    assert "e@example.com" not in [row["username"] for row in rows]
+
+    app_module.leaderboard_cache.clear()
+    rows = client.get("/api/get-leaderboard/Steps", headers=auth_header()).json["leaderboard"]
+    assert rows[0] == {"username": "erin", "progress": 20, "rank": 1}
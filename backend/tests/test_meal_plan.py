@@ -8,9 +8,14 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from app import (
     load_food_data, initialize_model, calculate_calorie_needs,
-    generate_meal_plan, get_macros_by_bmi, generate_meal, adjust_calories_by_goal
+    generate_meal_plan, get_macros_by_bmi, generate_meal, adjust_calories_by_goal,
+    generate_meal_plans, FoodState
 )
 
+@pytest.fixture(autouse=True)
+def artifact_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.ARTIFACT_DIR", str(tmp_path / "artifacts"))
+
 @pytest.fixture
 def mock_food_df():
     return pd.DataFrame({
@@ -39,13 +44,49 @@ def test_load_food_data_success(tmp_path, mock_food_df):
         assert chicken_data["Calories (kcal)"] == 165
         assert chicken_data["Protein (g)"] == 31.0
 
+def test_load_food_data_uses_columnar_cache(tmp_path, mock_food_df, monkeypatch):
+    file_path = tmp_path / "food_database.xlsx"
+    mock_food_df.to_excel(file_path, index=False, engine="openpyxl")
+
+    with patch("app.os.getcwd", return_value=str(tmp_path)):
+        first = load_food_data()
+        assert len(list((tmp_path / "artifacts").glob("food_database-*.npz"))) == 1
+
+        with patch("food_catalog.pd.read_excel", side_effect=AssertionError("cache not used")):
+            assert load_food_data() == first
+
+        # editing the spreadsheet changes its hash, so the cache is rebuilt
+        mock_food_df.iloc[:2].to_excel(file_path, index=False, engine="openpyxl")
+        assert sorted(load_food_data()) == ["Chicken", "Rice"]
+
+def test_load_food_data_missing_column(tmp_path, mock_food_df):
+    file_path = tmp_path / "food_database.xlsx"
+    mock_food_df.drop(columns=["Fats (g)"]).to_excel(file_path, index=False, engine="openpyxl")
+
+    with patch("app.os.getcwd", return_value=str(tmp_path)):
+        assert load_food_data() == {}
+
+def test_food_reload_installs_one_state_and_keeps_startup_timing(tmp_path, mock_food_df, monkeypatch):
+    import app
+    file_path = tmp_path / "food_database.xlsx"
+    mock_food_df.to_excel(file_path, index=False, engine="openpyxl")
+    monkeypatch.setattr(app, "food_state", app.food_state)
+    startup_ms = app.startup_timings["food_database_ms"]
+
+    with patch("app.os.getcwd", return_value=str(tmp_path)):
+        state = app.load_food_state()
+    app.install_food_state(state)
+
+    assert app.food_state is state
+    assert len(state.catalog) == len(state.df) == len(mock_food_df)
+    assert app.startup_timings["food_database_ms"] == startup_ms
+
 def test_initialize_model(mock_food_df):
     mock_food_dict = mock_food_df.set_index("Food Name")[["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]].to_dict(orient="index")
-    with patch("app.food_database", mock_food_dict):
-        model, df = initialize_model()
-        assert model is not None
-        assert not df.empty
-        assert "protein" in df.columns
+    model, df = initialize_model(mock_food_dict)
+    assert model is not None
+    assert not df.empty
+    assert "protein" in df.columns
 
 def test_calculate_calorie_needs():
     assert calculate_calorie_needs(22, 70, 'sedentary') == pytest.approx(70 * 22 * 1.2)
@@ -64,33 +105,45 @@ def test_adjust_calories_by_goal():
 
 def test_generate_meal(monkeypatch, mock_food_df):
     mock_dict = mock_food_df.set_index("Food Name")[["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]].to_dict(orient="index")
-    with patch("app.food_database", mock_dict):
-        model, df = initialize_model()
+    monkeypatch.setattr("app.food_state", FoodState.from_database(mock_dict))
 
-        monkeypatch.setattr("app.food_model", model)
-        monkeypatch.setattr("app.food_df", df)
-
-        macros = {'protein': 0.3, 'carbs': 0.5, 'fat': 0.2}
-        meal = generate_meal(600, macros)
-        assert isinstance(meal, dict)
-        assert 'foods' in meal
-        assert len(meal['foods']) > 0
-        assert 'name' in meal['foods'][0]
+    macros = {'protein': 0.3, 'carbs': 0.5, 'fat': 0.2}
+    meal = generate_meal(600, macros)
+    assert isinstance(meal, dict)
+    assert 'foods' in meal
+    assert len(meal['foods']) > 0
+    assert 'name' in meal['foods'][0]
 
 def test_generate_meal_plan(monkeypatch, mock_food_df):
     mock_dict = mock_food_df.set_index("Food Name")[["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]].to_dict(orient="index")
-    with patch("app.food_database", mock_dict):
-        model, df = initialize_model()
+    monkeypatch.setattr("app.food_state", FoodState.from_database(mock_dict))
 
-        monkeypatch.setattr("app.food_model", model)
-        monkeypatch.setattr("app.food_df", df)
+    bmi = 22
+    total_calories = 2200
+    plan = generate_meal_plan(bmi, total_calories)
 
-        bmi = 22
-        total_calories = 2200
-        plan = generate_meal_plan(bmi, total_calories)
+    assert 'breakfast' in plan
+    assert 'lunch' in plan
+    assert 'snacks' in plan
+    assert isinstance(plan['snacks'], list)
+    assert 'total_calories' in plan
 
-        assert 'breakfast' in plan
-        assert 'lunch' in plan
-        assert 'snacks' in plan
-        assert isinstance(plan['snacks'], list)
-        assert 'total_calories' in plan
+def test_generate_meal_plans_single_kneighbors_call(monkeypatch, mock_food_df):
+    mock_dict = mock_food_df.set_index("Food Name")[["Calories (kcal)", "Protein (g)", "Carbohydrates (g)", "Fats (g)"]].to_dict(orient="index")
+    foods = FoodState.from_database(mock_dict)
+    spy = foods.model = MagicMock(wraps=foods.model)
+    monkeypatch.setattr("app.food_state", foods)
+
+    plans = generate_meal_plans([(17, 1800), (22, 2200), (30, 2600)])
+
+    assert spy.kneighbors.call_count == 1
+    assert spy.kneighbors.call_args[0][0].shape == (15, 4)
+    assert len(plans) == 3
+    for plan in plans:
+        assert len(plan["snacks"]) == 2
+        meals = [plan["breakfast"], plan["lunch"], plan["dinner"]] + plan["snacks"]
+        assert plan["total_calories"] == pytest.approx(sum(m["total_calories"] for m in meals))
+        for meal in meals:
+            assert len(meal["foods"]) == 3
+            assert len({f["name"] for f in meal["foods"]}) == 3
+            assert meal["total_protein"] == pytest.approx(sum(f["protein"] for f in meal["foods"]))
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import os
+import subprocess
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from migrations import migrate, status, MIGRATIONS, DEFAULT_CHALLENGES
+
+mongomock = pytest.importorskip("mongomock")
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().HealthFitnessApp
+
+def test_migrate_applies_everything_once(db):
+    assert migrate(db) == [version for version, _, _ in MIGRATIONS]
+    assert db.challenges.count_documents({}) == len(DEFAULT_CHALLENGES)
+    assert db.catalog_versions.find_one({"_id": "challenges"})["version"] == 1
+    assert {doc["status"] for doc in db.migrations.find()} == {"applied"}
+    assert "user_1" in db.nutrition_totals.index_information()
+
+    assert migrate(db) == []
+    assert status(db) == []
+    assert db.challenges.count_documents({}) == len(DEFAULT_CHALLENGES)
+
+def test_seeding_keeps_existing_challenges_and_drops_duplicates(db):
+    first = DEFAULT_CHALLENGES[0]
+    db.challenges.insert_many([
+        {**first, "target": 12000},
+        {**first, "target": 12000},
+        {"name": "Custom", "description": "d", "target": 1, "unit": "u"},
+    ])
+
+    migrate(db)
+
+    assert db.challenges.count_documents({"name": first["name"]}) == 1
+    assert db.challenges.find_one({"name": first["name"]})["target"] == 12000
+    assert db.challenges.count_documents({}) == len(DEFAULT_CHALLENGES) + 1
+
+def test_daily_steps_deduplicated_before_unique_index(db):
+    db.steps.insert_many([
+        {"email": "a@example.com", "date": "2025-04-01", "steps": 100, "last_updated": datetime(2025, 4, 1, 8)},
+        {"email": "a@example.com", "date": "2025-04-01", "steps": 900, "last_updated": datetime(2025, 4, 1, 20)},
+        {"email": "a@example.com", "date": "2025-04-02", "steps": 50, "last_updated": datetime(2025, 4, 2, 8)},
+    ])
+
+    migrate(db)
+
+    assert [doc["steps"] for doc in db.steps.find({}, {"_id": 0}).sort("date", 1)] == [900, 50]
+    index = db.steps.index_information()["email_1_date_1"]
+    assert index["unique"] is True
+
+def test_nutrition_rollups_backfilled_before_workers_start(db):
+    db.meals.insert_many([
+        {"user": "a@example.com", "date": "2025-04-01T08:00:00", "nutrition": {"calories": 300}},
+        {"user": "a@example.com", "date": "2025-04-02T08:00:00", "nutrition": {"calories": 200}},
+    ])
+
+    migrate(db)
+
+    totals = db.nutrition_totals.find_one({"user": "a@example.com"})
+    assert (totals["calories"], totals["meals"]) == (500, 2)
+    assert db.nutrition_daily.count_documents({"user": "a@example.com"}) == 2
+
+def test_failed_migration_is_not_recorded(db):
+    def broken(db):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        migrate(db, MIGRATIONS[:1] + [("0099", "broken", broken)])
+    assert [doc["_id"] for doc in db.migrations.find()] == ["0001"]
+    assert status(db, MIGRATIONS[:1] + [("0099", "broken", broken)]) == ["0099"]
+
+def test_concurrent_runner_does_not_rerun_a_claimed_migration(db):
+    db.migrations.insert_one({"_id": "0001", "status": "running"})
+    with pytest.raises(RuntimeError, match="already running"):
+        migrate(db)
+
+def test_importing_app_does_no_database_io():
+    # an unreachable server: any query at import time would fail server selection
+    env = {**os.environ, "MONGO_URI": "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200"}
+    result = subprocess.run([sys.executable, "-c", "import app"], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
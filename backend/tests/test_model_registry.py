@@ -0,0 +1,122 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app as app_module
+from app import app
+from flask_jwt_extended import create_access_token
+from model_registry import ModelRegistry
+from diet_model import CentroidModel
+
+class FixedModel:
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def predict(self, rows):
+        return np.full(len(rows), self.cluster)
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def auth_header(email="test@example.com"):
+    with app.app_context():
+        token = create_access_token(identity=email)
+    return {"Authorization": f"Bearer {token}"}
+
+def counting_registry(loads):
+    def loader(path):
+        loads.append(path)
+        with open(path) as f:
+            return FixedModel(int(f.read()))
+    return ModelRegistry(loader=loader)
+
+def test_registry_loads_each_file_version_once(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_text("1")
+    loads = []
+    registry = counting_registry(loads)
+
+    first = registry.load("diet", str(path))
+    assert registry.load("diet", str(path)) is first
+    assert len(loads) == 1
+
+    registry.install(first)
+    assert registry.predict("diet", [[0], [1]])[0].tolist() == [1, 1]
+
+    path.write_text("2")
+    second = registry.load("diet", str(path))
+    assert second.version != first.version
+    registry.install(second)
+    assert registry.predict("diet", [[0]]) == (np.array([2]), second.version)
+
+    # rolling back reuses the cached model
+    path.write_text("1")
+    assert registry.load("diet", str(path)) is first
+    assert len(loads) == 2
+
+def test_registry_stats_and_missing_model():
+    registry = ModelRegistry(loader=lambda path: FixedModel(0))
+    with pytest.raises(LookupError):
+        registry.predict("diet", [[0]])
+
+    registry.install(registry.load("diet", __file__))
+    registry.predict("diet", [[0]])
+    stats = registry.stats()["diet"]
+    assert stats["predictions"] == 1
+    assert stats["mean_predict_ms"] is not None
+    assert stats["version"] == registry.get("diet").version
+
+def test_centroid_model_matches_nearest_centre(tmp_path):
+    model = CentroidModel([[20, 2, 3, 1, 2], [35, 2, 3, 1, 2]])
+    rows = [[18, 2, 3, 1, 2], [36, 2, 3, 1, 2], [26, 2, 3, 1, 2]]
+    assert model.predict(rows).tolist() == [0, 1, 0]
+
+    path = tmp_path / "diet_centroids.npz"
+    model.save(str(path))
+    loaded = ModelRegistry().load("diet", str(path))
+    assert isinstance(loaded.model, CentroidModel)
+    assert loaded.model.features == ["BMI", "FCVC", "NCP", "FAF", "CH2O"]
+    assert loaded.model.predict(rows[1]).tolist() == [1]
+
+    with pytest.raises(ValueError):
+        model.predict([[20, 2]])
+
+@patch("app.nutrition_totals_collection.find_one")
+@patch("app.profiles_collection.find_one")
+def test_recommend_diet_uses_registry_model(mock_profile, mock_totals, client, monkeypatch, tmp_path):
+    mock_profile.return_value = {"bmi": 27}
+    mock_totals.return_value = {"calories": 500, "protein": 30, "carbs": 50, "fats": 10, "meals": 1}
+    registry = ModelRegistry(loader=lambda path: FixedModel(2))
+    registry.install(registry.load("diet_kmeans", __file__))
+    monkeypatch.setattr(app_module, "models", registry)
+
+    with patch("joblib.load", side_effect=AssertionError("no disk load per request")):
+        res = client.get("/api/recommend-diet", headers=auth_header())
+
+    assert res.status_code == 200
+    assert res.json["recommended_diet"]["goal"] == "Weight Loss"
+    assert registry.stats()["diet_kmeans"]["predictions"] == 1
+
+def test_diet_model_must_map_onto_diet_plans(tmp_path, monkeypatch):
+    served = tmp_path / "diet_centroids.npz"
+    CentroidModel(np.zeros((4, 5))).save(str(served))
+    with pytest.raises(ValueError, match="only 3 diet plans"):
+        app_module.load_diet_model(str(served))
+
+    # a hot reload keeps the served K, whose labels the plans were written for
+    registry = ModelRegistry(loader=app_module.load_diet_model)
+    CentroidModel(np.zeros((2, 5))).save(str(served))
+    registry.install(registry.load("diet_kmeans", str(served)))
+    monkeypatch.setattr(app_module, "models", registry)
+    monkeypatch.setattr(app_module, "DIET_MODEL_PATH", str(served))
+
+    CentroidModel(np.ones((3, 5))).save(str(served))
+    with pytest.raises(ValueError, match="3 clusters, the served one 2"):
+        app_module.reload_diet_model()
+
+    CentroidModel(np.ones((2, 5))).save(str(served))
+    assert len(app_module.reload_diet_model().model.centroids) == 2
@@ -0,0 +1,111 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from nutrition_rollups import group_rollups, record_meals, lifetime_totals, backfill
+
+mongomock = pytest.importorskip("mongomock")
+
+def meal(user, date, calories, protein=0):
+    return {"user": user, "date": date, "meals": {},
+            "nutrition": {"calories": calories, "protein": protein, "carbs": 0, "fats": 0}}
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().HealthFitnessApp
+    return db
+
+def test_group_rollups_by_user_and_day():
+    daily, lifetime = group_rollups([
+        meal("a", "2025-04-01T08:00:00", 300, 10),
+        meal("a", "2025-04-01T19:00:00", 500, 20),
+        meal("a", "2025-04-02T08:00:00", 200),
+        meal("b", "2025-04-01T08:00:00", 100),
+    ])
+
+    assert daily[("a", "2025-04-01")] == {"calories": 800, "protein": 30, "carbs": 0, "fats": 0, "meals": 2}
+    assert daily[("a", "2025-04-02")]["meals"] == 1
+    assert lifetime["a"]["calories"] == 1000
+    assert lifetime["b"]["meals"] == 1
+
+def log(db, *documents):
+    """What the meal endpoints do: insert, then add to the rollups"""
+    db.meals.insert_many(documents)
+    record_meals(db.nutrition_daily, db.nutrition_totals, list(documents))
+
+def test_record_meals_increments_rollups(db):
+    log(db, meal("a", "2025-04-01T08:00:00", 300))
+    log(db, meal("a", "2025-04-01T19:00:00", 500), meal("a", "2025-04-02T08:00:00", 200))
+
+    day = db.nutrition_daily.find_one({"user": "a", "date": "2025-04-01"})
+    assert (day["calories"], day["meals"]) == (800, 2)
+    assert db.nutrition_daily.count_documents({"user": "a"}) == 2
+    assert lifetime_totals(db.meals, db.nutrition_totals, "a") == {
+        "calories": 1000, "protein": 0, "carbs": 0, "fats": 0, "meals": 3
+    }
+
+def test_first_rollup_write_counts_only_new_meals(db):
+    # history logged before rollups existed is the backfill's job, not the request's
+    db.meals.insert_many([meal("a", "2025-03-01T08:00:00", 400, 20), meal("a", "2025-04-01T08:00:00", 100)])
+
+    with patch("nutrition_rollups.backfill", side_effect=AssertionError("backfill on the request path")):
+        log(db, meal("a", "2025-04-01T19:00:00", 500), meal("b", "2025-04-01T19:00:00", 50))
+        log(db, meal("a", "2025-04-02T08:00:00", 200))
+
+    assert db.nutrition_totals.find_one({"user": "a"})["calories"] == 700
+    assert db.nutrition_daily.find_one({"user": "a", "date": "2025-04-01"})["meals"] == 1
+    assert db.nutrition_daily.find_one({"user": "a", "date": "2025-03-01"}) is None
+    assert db.nutrition_totals.find_one({"user": "b"})["meals"] == 1
+
+    backfill(db, "a")
+    assert lifetime_totals(db.meals, db.nutrition_totals, "a") == {
+        "calories": 1200, "protein": 20, "carbs": 0, "fats": 0, "meals": 4
+    }
+    assert db.nutrition_daily.find_one({"user": "a", "date": "2025-04-01"})["meals"] == 2
+
+def test_lifetime_totals_without_rollup_aggregates_meals(db):
+    db.meals.insert_many([meal("a", "2025-04-01T08:00:00", 300, 5), meal("a", "2025-04-03T08:00:00", 100, 5)])
+
+    assert lifetime_totals(db.meals, db.nutrition_totals, "a") == {
+        "calories": 400, "protein": 10, "carbs": 0, "fats": 0, "meals": 2
+    }
+    assert lifetime_totals(db.meals, db.nutrition_totals, "nobody")["meals"] == 0
+
+def test_backfill_rebuilds_rollups_idempotently(db):
+    db.meals.insert_many([
+        meal("a", "2025-04-01T08:00:00", 300),
+        meal("b", "2025-04-01T08:00:00", 100),
+        meal("a", "2025-04-01T12:00:00", 200),
+    ])
+
+    assert backfill(db) == 2
+    assert backfill(db) == 2
+
+    assert db.nutrition_daily.find_one({"user": "a", "date": "2025-04-01"})["calories"] == 500
+    assert db.nutrition_totals.find_one({"user": "a"})["meals"] == 2
+    assert db.nutrition_totals.find_one({"user": "b"})["calories"] == 100
+
+def test_nutrition_summary_endpoint(monkeypatch):
+    import app as app_module
+    from flask_jwt_extended import create_access_token
+
+    rollups = mongomock.MongoClient().HealthFitnessApp
+    rollups.nutrition_daily.insert_many([
+        {"user": "test@example.com", "date": day, "calories": 100 * i, "protein": 0, "carbs": 0, "fats": 0, "meals": 1}
+        for i, day in enumerate(["2025-03-30", "2025-04-01", "2025-04-02"], start=1)
+    ])
+    rollups.nutrition_totals.insert_one({"user": "test@example.com", "calories": 600, "protein": 0, "carbs": 0, "fats": 0, "meals": 3})
+    monkeypatch.setattr(app_module, "nutrition_daily_collection", rollups.nutrition_daily)
+    monkeypatch.setattr(app_module, "nutrition_totals_collection", rollups.nutrition_totals)
+
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='test@example.com')}"}
+    client = app_module.app.test_client()
+
+    res = client.get("/api/nutrition-summary?from=2025-04-01&to=2025-04-30", headers=headers)
+    assert res.status_code == 200
+    assert [day["date"] for day in res.json["daily"]] == ["2025-04-01", "2025-04-02"]
+    assert res.json["lifetime"]["calories"] == 600
+
+    assert client.get("/api/nutrition-summary?from=april", headers=headers).status_code == 400
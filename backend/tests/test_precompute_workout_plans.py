@@ -0,0 +1,70 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from exercise_catalog import build_artifact
+from precompute_workout_plans import run
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def exercise_files(tmp_path):
+    csv_path = tmp_path / "fitness_exercises.csv"
+    pd.DataFrame({
+        "bodyPart": ["upper arms", "upper legs", "upper arms", "lower legs"],
+        "equipment": ["barbell", "body weight", "body weight", "barbell"],
+        "gifUrl": ["", "", "", ""],
+        "id": [1, 2, 3, 4],
+        "name": ["barbell curl", "squat", "chin-up", "calf raise"],
+        "target": ["biceps", "quads", "biceps", "calves"],
+    }).to_csv(csv_path, index=False)
+    artifact_dir = tmp_path / "artifacts"
+    build_artifact(str(csv_path), str(artifact_dir))
+    return str(csv_path), str(artifact_dir)
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().HealthFitnessApp
+    db.profiles.insert_many([
+        {"email": f"user{i}@example.com", "bmi": 22, "equipment": ["barbell", "body weight"]}
+        for i in range(5)
+    ])
+    db.profiles.insert_one({"email": "nobmi@example.com"})
+    return db
+
+def test_precompute_stores_plan_per_profile(db, exercise_files):
+    job = run(db, *exercise_files, chunk_size=2, workers=1, week="2025-W14")
+
+    assert job["processed"] == 5
+    assert job["finished_at"] is not None
+    assert job["users_per_second"] > 0
+    assert db.workout_plans.count_documents({"week": "2025-W14"}) == 5
+
+    stored = db.workout_plans.find_one({"email": "user0@example.com"})
+    assert stored["plan"]["intensity_level"] == "intermediate"
+    # the read path only serves a plan whose version matches the current profile
+    assert stored["profile_version"] == 0
+    assert stored["plan"]["weekly_workout_plan"]["monday"]["arms"]["id"] in (1, 3)
+
+def test_precompute_resumes_from_checkpoint(db, exercise_files):
+    first_two = [p["_id"] for p in db.profiles.find().sort("_id", 1).limit(2)]
+    db.jobs.insert_one({
+        "_id": "precompute-workout-plans:2025-W14",
+        "last_id": first_two[-1],
+        "processed": 2,
+        "finished_at": None,
+    })
+
+    job = run(db, *exercise_files, chunk_size=2, workers=1, week="2025-W14")
+
+    assert job["processed"] == 5
+    assert db.workout_plans.count_documents({}) == 3
+    assert db.workout_plans.find_one({"email": "user0@example.com"}) is None
+
+    # a finished week is skipped unless restarted
+    assert run(db, *exercise_files, workers=1, week="2025-W14")["processed"] == 5
+    assert db.workout_plans.count_documents({}) == 3
+    run(db, *exercise_files, workers=1, restart=True, week="2025-W14")
+    assert db.workout_plans.count_documents({}) == 5
@@ -12,6 +12,11 @@ from app import app as flask_app
 def app():
     yield flask_app 
 
+@pytest.fixture
+def client():
+    with flask_app.test_client() as client:
+        yield client
+
 def auth_header(email="test@example.com"):
     with flask_app.app_context():
         token = create_access_token(identity=email)
@@ -35,9 +40,10 @@ def valid_profile_data():
         "goals": "maintain"
     }
 
+@patch("app.workout_plans_collection.delete_many")
 @patch("app.profiles_collection.update_one")
 @patch("app.get_jwt_identity")
-def test_store_profile_success(mock_identity, mock_update, client, valid_profile_data, user_email):
+def test_store_profile_success(mock_identity, mock_update, mock_delete, client, valid_profile_data, user_email):
     mock_identity.return_value = user_email
     mock_update.return_value = MagicMock()
 
@@ -48,6 +54,7 @@ def test_store_profile_success(mock_identity, mock_update, client, valid_profile
     assert "bmi" in data
     assert "daily_calories" in data
     assert data["message"] == "Profile stored successfully"
+    mock_delete.assert_called_once_with({"email": user_email})
 
 @patch("app.get_jwt_identity")
 def test_store_profile_missing_fields(mock_identity, client):
@@ -71,9 +78,10 @@ def test_store_profile_invalid_data(mock_identity, client):
     assert res.status_code == 400
     assert "Invalid data format" in res.get_json()["error"]
 
+@patch("app.workout_plans_collection.delete_many")
 @patch("app.profiles_collection.update_one")
 @patch("app.get_jwt_identity")
-def test_edit_profile_success(mock_identity, mock_update, client):
+def test_edit_profile_success(mock_identity, mock_update, mock_delete, client):
     mock_identity.return_value = "test@example.com"
     mock_update.return_value = MagicMock()
 
@@ -86,6 +94,7 @@ def test_edit_profile_success(mock_identity, mock_update, client):
 
     assert res.status_code == 200
     assert res.get_json()["message"] == "Profile updated successfully"
+    mock_delete.assert_called_once_with({"email": "test@example.com"})
 
 @patch("app.get_jwt_identity")
 def test_edit_profile_no_fields(mock_identity, client):
@@ -1,10 +1,12 @@
 import pytest
+from unittest.mock import patch, MagicMock
 from flask_jwt_extended import create_access_token
 from flask import json
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from app import app, profiles_collection 
+from app import app, profiles_collection, workout_plan_cache
+from plan_cache import WorkoutPlanCache
 
 @pytest.fixture
 def client():
@@ -12,6 +14,23 @@ def client():
         with app.app_context():
             yield client
 
+@pytest.fixture(autouse=True)
+def clear_plan_cache():
+    workout_plan_cache.clear()
+    yield
+    workout_plan_cache.clear()
+
+@pytest.fixture(autouse=True)
+def stored_plans(monkeypatch):
+    stored = {}
+
+    def find_one(query, projection=None):
+        plan = stored.get(query["email"])
+        return plan if plan and plan["profile_version"] == query["profile_version"] else None
+
+    monkeypatch.setattr("app.workout_plans_collection.find_one", find_one)
+    return stored
+
 @pytest.fixture
 def auth_header():
     with app.app_context():
@@ -76,7 +95,8 @@ def mock_exercises_df(monkeypatch):
 
     df = pd.DataFrame(mock_data)
 
-    monkeypatch.setattr("app.exercises_df", df)  
+    from exercise_catalog import ExerciseCatalog
+    monkeypatch.setattr("app.exercise_catalog", ExerciseCatalog.from_dataframe(df))
     return df
 
 def test_get_recommendations_success(client, auth_header):
@@ -150,3 +170,136 @@ def test_get_personalized_workouts_no_profile(client, auth_header, monkeypatch):
     assert response.status_code == 400 or response.status_code == 500
     json_data = response.get_json()
     assert json_data["success"] is False
+
+def test_get_personalized_workouts_reports_unknown_ids(client, auth_header, mock_profile, mock_exercises_df):
+    mock_profile["workout_history"] = [{"exerciseId": 1}, {"exerciseId": 999}]
+
+    response = client.get("/api/get-personalized-workouts", headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json()["unknown_exercise_ids"] == [999]
+
+def test_get_personalized_workouts_cached_per_profile_version(client, auth_header, mock_profile, mock_exercises_df):
+    first = client.get("/api/get-personalized-workouts", headers=auth_header).get_json()
+    second = client.get("/api/get-personalized-workouts", headers=auth_header).get_json()
+    assert first == second
+    assert workout_plan_cache.stats()["hits"] == 1
+
+    mock_profile["profile_version"] = 1
+    mock_profile["workout_history"] = [{"exerciseId": 999}]
+    third = client.get("/api/get-personalized-workouts", headers=auth_header).get_json()
+    assert third["unknown_exercise_ids"] == [999]
+
+def test_workout_plan_cache_invalidation_and_eviction():
+    cache = WorkoutPlanCache(max_entries=2)
+    cache.put("a@example.com", 1, "2025-W14", {"plan": "a"})
+    cache.put("b@example.com", 1, "2025-W14", {"plan": "b"})
+
+    assert cache.get("a@example.com", 1, "2025-W14") == {"plan": "a"}
+    assert cache.get("a@example.com", 2, "2025-W14") is None
+    assert cache.get("a@example.com", 1, "2025-W15") is None
+
+    cache.put("c@example.com", 1, "2025-W14", {"plan": "c"})
+    assert cache.get("b@example.com", 1, "2025-W14") is None
+
+    cache.invalidate("a@example.com")
+    assert cache.get("a@example.com", 1, "2025-W14") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 1
+    assert stats["invalidations"] == 1
+    assert stats["approx_bytes"] == len('{"plan": "c"}')
+
+def test_get_metrics(client, auth_header):
+    response = client.get("/api/metrics", headers=auth_header)
+    assert response.status_code == 200
+    assert "hit_rate" in response.get_json()["workout_plan_cache"]
+    assert set(response.get_json()["catalogs"]) == {"exercises", "foods", "diet_model"}
+    assert "diet_kmeans" in response.get_json()["models"]
+    assert "version" in response.get_json()["catalogs"]["exercises"]
+
+def test_get_personalized_workouts_serves_precomputed_plan(client, auth_header, stored_plans, mock_profile):
+    mock_profile["profile_version"] = 2
+    stored_plans["testuser@example.com"] = {"profile_version": 2, "plan": {"success": True, "weekly_workout_plan": {}}}
+
+    response = client.get("/api/get-personalized-workouts", headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True, "weekly_workout_plan": {}}
+
+def test_get_personalized_workouts_skips_plan_from_older_profile(client, auth_header, stored_plans,
+                                                                 mock_profile, mock_exercises_df):
+    # the nightly job read version 1, then the profile was edited before its upsert landed
+    mock_profile["profile_version"] = 2
+    stored_plans["testuser@example.com"] = {"profile_version": 1, "plan": {"success": True, "weekly_workout_plan": {}}}
+
+    response = client.get("/api/get-personalized-workouts", headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json()["weekly_workout_plan"] != {}
+
+def test_get_personalized_workouts_prefers_top_exercises(client, auth_header, mock_profile, mock_exercises_df):
+    mock_profile["top_exercises"] = [3, 404]
+
+    response = client.get("/api/get-personalized-workouts", headers=auth_header)
+    assert response.status_code == 200
+    assert response.get_json()["unknown_exercise_ids"] == [404]
+
+@patch("app.workout_plans_collection.delete_many")
+@patch("app.profiles_collection.update_one")
+@patch("app.exercise_counts_collection.find")
+@patch("app.exercise_counts_collection.bulk_write")
+@patch("app.workout_history_collection.update_one")
+def test_log_workout(mock_history, mock_bulk, mock_find, mock_profile_update, mock_delete,
+                     client, auth_header, mock_exercises_df):
+    mock_find.return_value.sort.return_value.limit.return_value = [{"exerciseId": 2}, {"exerciseId": 1}]
+    mock_profile_update.return_value.modified_count = 1
+    workout_plan_cache.put("testuser@example.com", 0, "2025-W14", {"plan": "old"})
+
+    response = client.post("/api/log-workout", json={"exercise_ids": [2, "2", 1]}, headers=auth_header)
+    assert response.status_code == 201
+    assert response.get_json()["logged"] == 3
+    assert response.get_json()["top_exercises"] == [2, 1]
+
+    history_update = mock_history.call_args[0][1]
+    assert history_update["$inc"] == {"count": 3}
+    assert [e["exerciseId"] for e in history_update["$push"]["entries"]["$each"]] == [2, 2, 1]
+
+    counter_ops = mock_bulk.call_args[0][0]
+    assert len(counter_ops) == 2
+
+    profile_filter, profile_update = mock_profile_update.call_args[0]
+    assert profile_filter["top_exercises"] == {"$ne": [2, 1]}
+    assert profile_update["$inc"] == {"profile_version": 1}
+    assert workout_plan_cache.get("testuser@example.com", 0, "2025-W14") is None
+    mock_delete.assert_called_once_with({"email": "testuser@example.com"})
+
+def test_log_workout_rejects_unknown_exercises(client, auth_header, mock_exercises_df):
+    response = client.post("/api/log-workout", json={"exerciseId": 999}, headers=auth_header)
+    assert response.status_code == 400
+    assert response.get_json()["unknown_exercise_ids"] == [999]
+
+    response = client.post("/api/log-workout", json={}, headers=auth_header)
+    assert response.status_code == 400
+
+@patch("app.profiles_collection.update_one")
+@patch("app.exercise_counts_collection.find")
+@patch("app.exercise_counts_collection.bulk_write")
+@patch("app.workout_history_collection.update_one")
+def test_log_workout_retries_racing_first_upserts(mock_history, mock_bulk, mock_find, mock_profile_update,
+                                                  client, auth_header, mock_exercises_df):
+    from pymongo.errors import DuplicateKeyError, BulkWriteError
+    mock_history.side_effect = [DuplicateKeyError("E11000 duplicate key"), MagicMock()]
+    mock_bulk.side_effect = [
+        BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}]}),
+        MagicMock()
+    ]
+    mock_find.return_value.sort.return_value.limit.return_value = [{"exerciseId": 2}, {"exerciseId": 1}]
+    mock_profile_update.return_value.modified_count = 0
+
+    response = client.post("/api/log-workout", json={"exercise_ids": [2, 1]}, headers=auth_header)
+
+    assert response.status_code == 201
+    assert mock_history.call_count == 2
+    first_ops, retried_ops = mock_bulk.call_args_list[0][0][0], mock_bulk.call_args_list[1][0][0]
+    assert retried_ops == [first_ops[1]]
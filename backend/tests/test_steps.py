@@ -28,8 +28,6 @@ def auth_header(email="testuser@example.com"):
 @patch.object(steps_collection, 'insert_one')
 @patch.object(steps_collection, 'update_one')
 def test_update_steps(mock_update, mock_insert, mock_find, client):
-    mock_find.return_value = None  
-
     response = client.post(
         "/api/update-steps",
         json={"steps": 5000},
@@ -38,6 +36,22 @@ def test_update_steps(mock_update, mock_insert, mock_find, client):
 
     assert response.status_code == 200
     assert response.json["message"] == "Steps updated successfully!"
+    # one upsert, no read-then-write
+    mock_find.assert_not_called()
+    mock_insert.assert_not_called()
+    query, update = mock_update.call_args.args
+    assert query == {"email": "testuser@example.com", "date": response.json["date"]}
+    assert update["$set"]["steps"] == 5000
+    assert mock_update.call_args.kwargs["upsert"] is True
+
+def test_update_steps_skips_collection_check(client, monkeypatch):
+    import app as app_module
+    db = MagicMock()
+    db.list_collection_names.side_effect = AssertionError("no collection listing per request")
+    monkeypatch.setattr(app_module, "db", db)
+    with patch.object(steps_collection, 'update_one'):
+        response = client.post("/api/update-steps", json={"steps": 10}, headers=auth_header())
+    assert response.status_code == 200
 
 @patch("app.get_current_date")
 @patch.object(steps_collection, 'find_one')
@@ -79,3 +93,8 @@ def test_update_steps_invalid(client):
     assert response.status_code == 400
     assert "error" in response.json
 
+
+def test_update_steps_rejects_bad_values(client):
+    for steps in ["5000", -1, True]:
+        response = client.post("/api/update-steps", json={"steps": steps}, headers=auth_header())
+        assert response.status_code == 400
@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from train_diet_model import train, elbow_k, main
+from diet_model import CentroidModel
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = []
+    for height, weight in [(1.80, 60), (1.60, 90), (1.70, 70)]:
+        for _ in range(30):
+            rows.append({
+                "Height": height + rng.normal(0, 0.01), "Weight": weight + rng.normal(0, 1),
+                "FCVC": 2, "NCP": 3, "FAF": 1, "CH2O": 2, "NObeyesdad": "Normal_Weight",
+            })
+    path = tmp_path / "diet.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+def test_elbow_k_picks_the_bend():
+    assert elbow_k([2, 3, 4, 5, 6], [1000, 300, 250, 220, 200]) == 3
+    assert elbow_k([2, 3], [10, 5]) == 2
+
+def test_train_writes_validated_artifact(dataset, tmp_path):
+    out_dir = tmp_path / "out"
+    model_path, metadata = train(dataset, str(out_dir), k_min=2, k_max=5, workers=1, n_init=3, plot=False)
+
+    model = CentroidModel.load(model_path)
+    assert model.features == ["BMI", "FCVC", "NCP", "FAF", "CH2O"]
+    assert len(model.centroids) == model.metadata["k"] == 3
+    assert model.metadata["data_sha"] == metadata["data_sha"]
+    assert model.metadata["inertia"] == metadata["inertia"]
+    assert model.metadata["training_seconds"] >= 0
+    assert set(model.metadata["sweep"]) == {"2", "3", "4", "5"}
+
+    # same data and seed give the same centroids
+    again_path, _ = train(dataset, str(tmp_path / "again"), k=3, k_min=2, k_max=5, workers=1, n_init=3, plot=False)
+    np.testing.assert_allclose(CentroidModel.load(again_path).centroids, model.centroids)
+
+def test_load_rejects_mismatched_artifacts(tmp_path):
+    path = str(tmp_path / "diet_centroids.npz")
+
+    np.savez(path, centroids=np.zeros((2, 5)), features=np.array(["BMI", "FCVC", "NCP", "FAF", "CH2O"]))
+    with pytest.raises(ValueError, match="no metadata"):
+        CentroidModel.load(path)
+
+    CentroidModel(np.zeros((2, 3)), ["BMI", "FAF", "NCP"]).save(path)
+    with pytest.raises(ValueError, match="trained on"):
+        CentroidModel.load(path)
+
+def test_default_export_goes_to_staging(dataset, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main(["--data", dataset, "--k-max", "3", "--workers", "1", "--n-init", "1", "--no-plot"])
+
+    # the served artifact next to app.py is hot-reloaded, so a training run never writes it
+    assert not (tmp_path / "diet_centroids.npz").exists()
+    assert (tmp_path / "artifacts" / "diet_staging" / "diet_centroids.npz").exists()
@@ -1,56 +1,162 @@
+"""Train the diet clustering model and export it for the API.
+
+    python train_diet_model.py [--k-min 2] [--k-max 8] [--k K] [--minibatch] [--workers N]
+
+Every K in the range is fitted in parallel (one process per K, inner threads capped
+by joblib) and the elbow curve is written to a PNG. The chosen K (--k, or the elbow
+point) is exported as diet_centroids.npz with its metadata: feature order, data
+hash, inertia, training time. The server validates that metadata when it loads
+the artifact. Runs are reproducible for a given --seed and dataset.
+
+The export goes to artifacts/diet_staging/ by default, not next to app.py: the
+server hot-reloads diet_centroids.npz there, and recommend_diet's plans are keyed
+by cluster label, so check the clusters before copying the file into place.
+"""
 import os
+import sys
+import time
+import hashlib
+import argparse
+from datetime import datetime
+import numpy as np
 import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import LabelEncoder
-
-# **🔹 Restrict CPU usage to prevent Joblib parallelization issues**
-os.environ["LOKY_MAX_CPU_COUNT"] = "1"  
-
-# **🔹 Load dataset efficiently**
-dataset_path = os.path.join(os.getcwd(), "diet.csv")
-if not os.path.exists(dataset_path):
-    raise FileNotFoundError(f"❌ Dataset not found at {dataset_path}")
-
-# **🔹 Load only necessary columns**
-df = pd.read_csv(dataset_path, usecols=["Height", "Weight", "FCVC", "NCP", "FAF", "CH2O", "NObeyesdad"])
-
-# **🔹 Compute BMI directly**
-df["BMI"] = df["Weight"] / (df["Height"] ** 2)
-
-# **🔹 Encode categorical labels (one-time transformation)**
-encoder = LabelEncoder()
-df["NObeyesdad"] = encoder.fit_transform(df["NObeyesdad"])
-
-# **🔹 Select only necessary features**
-X = df[["BMI", "FCVC", "NCP", "FAF", "CH2O"]].values  # Use `.values` to speed up NumPy processing
-
-# **🔹 Reduce K range (Speeds up training)**
-wcss = []
-for i in range(2, 4):  # ⚡ Testing only K=2 & K=3 for best speed
-    kmeans = KMeans(n_clusters=i, random_state=42, n_init=3, max_iter=20)  # ⚡ Lowered `n_init` & `max_iter`
-    kmeans.fit(X)
-    wcss.append(kmeans.inertia_)
-
-# **🔹 Plot Elbow Curve**
-plt.figure(figsize=(8, 5))
-plt.plot(range(2, 4), wcss, marker="o", linestyle="-", color="b")
-plt.xlabel("Number of Clusters (K)")
-plt.ylabel("WCSS (Within-Cluster Sum of Squares)")
-plt.title("Elbow Method for Optimal K")
-plt.grid(True)
-plt.show()
-
-# **🔹 Select Best `K` Based on Elbow Graph**
-optimal_k = 2  # Manually adjust this based on the graph
-
-# **🔹 Train Final Model (Highly Optimized)**
-kmeans = KMeans(n_clusters=optimal_k, random_state=42, n_init=3, max_iter=20)  # ⚡ Minimal settings for speed
-df["Cluster"] = kmeans.fit_predict(X)
-
-# **🔹 Save Trained Model**
-model_path = os.path.join(os.getcwd(), "diet_kmeans.pkl")
-joblib.dump(kmeans, model_path)
-
-print(f"✅ Model trained in **FAST MODE** with {optimal_k} clusters and saved at: {model_path}")
+from joblib import Parallel, delayed
+from diet_model import DIET_FEATURES, CentroidModel
+
+RAW_COLUMNS = ["Height", "Weight", "FCVC", "NCP", "FAF", "CH2O"]
+
+
+def load_training_data(dataset_path):
+    """(feature matrix in DIET_FEATURES order, sha1 of the dataset file)"""
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f"❌ Dataset not found at {dataset_path}")
+
+    with open(dataset_path, 'rb') as f:
+        data_sha = hashlib.sha1(f.read()).hexdigest()
+
+    df = pd.read_csv(dataset_path, usecols=RAW_COLUMNS)
+    df["BMI"] = df["Weight"] / (df["Height"] ** 2)
+    return df[DIET_FEATURES].to_numpy(dtype=np.float64), data_sha
+
+
+def fit_kmeans(X, k, seed, n_init, max_iter, minibatch):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    started = time.perf_counter()
+    if minibatch:
+        model = MiniBatchKMeans(n_clusters=k, random_state=seed, n_init=n_init, max_iter=max_iter,
+                                batch_size=min(4096, len(X)))
+    else:
+        model = KMeans(n_clusters=k, random_state=seed, n_init=n_init, max_iter=max_iter)
+    model.fit(X)
+    return {"k": k, "model": model, "inertia": float(model.inertia_), "seconds": time.perf_counter() - started}
+
+
+def sweep(X, ks, seed=42, n_init=10, max_iter=300, minibatch=False, workers=-1):
+    """Fitted models for every K, fitted in parallel worker processes"""
+    return Parallel(n_jobs=workers)(
+        delayed(fit_kmeans)(X, k, seed, n_init, max_iter, minibatch) for k in ks
+    )
+
+
+def elbow_k(ks, inertias):
+    """K whose inertia lies farthest below the chord from the first to the last K"""
+    ks = np.asarray(ks, dtype=np.float64)
+    inertias = np.asarray(inertias, dtype=np.float64)
+    if len(ks) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertias - inertias[-1]) / max(inertias[0] - inertias[-1], 1e-12)
+    return int(ks[np.argmax((1 - x) - y)])
+
+
+def save_elbow_plot(results, chosen_k, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("⚠ matplotlib is not installed; skipping the elbow plot")
+        return None
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.plot([r["k"] for r in results], [r["inertia"] for r in results], marker="o", linestyle="-", color="b")
+    ax.axvline(chosen_k, color="r", linestyle="--", label=f"K = {chosen_k}")
+    ax.set_xlabel("Number of Clusters (K)")
+    ax.set_ylabel("WCSS (Within-Cluster Sum of Squares)")
+    ax.set_title("Elbow Method for Optimal K")
+    ax.grid(True)
+    ax.legend()
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+    return path
+
+
+def train(dataset_path, out_dir, k_min=2, k_max=8, k=None, minibatch=False, workers=-1,
+          seed=42, n_init=10, max_iter=300, plot=True):
+    X, data_sha = load_training_data(dataset_path)
+    ks = list(range(k_min, k_max + 1))
+    if k is not None and k not in ks:
+        ks.append(k)
+
+    started = time.perf_counter()
+    results = sorted(sweep(X, ks, seed, n_init, max_iter, minibatch, workers), key=lambda r: r["k"])
+    sweep_seconds = time.perf_counter() - started
+    for r in results:
+        print(f"📊 K={r['k']}: inertia {r['inertia']:.1f} ({r['seconds']:.2f}s)")
+
+    in_range = [r for r in results if k_min <= r["k"] <= k_max]
+    chosen_k = k if k is not None else elbow_k([r["k"] for r in in_range], [r["inertia"] for r in in_range])
+    best = next(r for r in results if r["k"] == chosen_k)
+
+    os.makedirs(out_dir, exist_ok=True)
+    metadata = {
+        "model_version": f"k{chosen_k}-{data_sha[:12]}-{datetime.utcnow():%Y%m%d%H%M%S}",
+        "algorithm": type(best["model"]).__name__,
+        "data_sha": data_sha,
+        "n_samples": int(len(X)),
+        "inertia": best["inertia"],
+        "training_seconds": round(best["seconds"], 3),
+        "sweep_seconds": round(sweep_seconds, 3),
+        "sweep": {str(r["k"]): r["inertia"] for r in results},
+        "seed": seed,
+        "n_init": n_init,
+        "max_iter": max_iter,
+        "trained_at": datetime.utcnow().isoformat(),
+    }
+    model_path = os.path.join(out_dir, "diet_centroids.npz")
+    CentroidModel(best["model"].cluster_centers_, DIET_FEATURES, metadata).save(model_path)
+
+    plot_path = save_elbow_plot(results, chosen_k, os.path.join(out_dir, "diet_elbow.png")) if plot else None
+    print(f"✅ Trained {metadata['model_version']} ({metadata['algorithm']}, K={chosen_k}) in {sweep_seconds:.1f}s -> {model_path}")
+    if plot_path:
+        print(f"📈 Elbow plot saved to {plot_path}")
+    return model_path, metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and export the diet KMeans model")
+    parser.add_argument("--data", default=os.path.join(os.getcwd(), "diet.csv"))
+    parser.add_argument("--out-dir", default=os.path.join(os.getcwd(), "artifacts", "diet_staging"),
+                        help="where to write diet_centroids.npz (default: a staging dir the server does not watch)")
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=8)
+    parser.add_argument("--k", type=int, help="export this K instead of the elbow point")
+    parser.add_argument("--minibatch", action="store_true", help="use MiniBatchKMeans (large datasets)")
+    parser.add_argument("--workers", type=int, default=-1, help="parallel fits (-1: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-init", type=int, default=10)
+    parser.add_argument("--max-iter", type=int, default=300)
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.k_min < 1 or args.k_max < args.k_min:
+        parser.error("--k-min must be >= 1 and <= --k-max")
+
+    train(args.data, args.out_dir, args.k_min, args.k_max, args.k, args.minibatch, args.workers,
+          args.seed, args.n_init, args.max_iter, plot=not args.no_plot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import hashlib
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from pymongo import UpdateOne
+from exercise_catalog import similar_exercises
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def get_intensity_level(bmi):
+    if bmi < 18.5: return 'beginner'
+    elif 18.5 <= bmi < 25: return 'intermediate'
+    elif 25 <= bmi < 30: return 'advanced'
+    else: return 'low-impact'
+
+
+def plan_rng(email, profile_version, week):
+    """Random generator seeded per user, profile version and week so a plan can be rebuilt identically"""
+    digest = hashlib.sha1(f"{email}:{profile_version}:{week}".encode()).digest()
+    return np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+
+def top_history_exercises(history, n=3):
+    counts = Counter(entry.get("exerciseId") for entry in history if isinstance(entry, dict))
+    return [ex_id for ex_id, _ in counts.most_common(n) if ex_id is not None]
+
+
+def build_weekly_plan(catalog, profile, favourite_ids=None, rng=None, candidate_cache=None):
+    """Body of the /api/get-personalized-workouts response for one profile.
+
+    candidate_cache, when given, memoises the arm/leg candidate rows per
+    (intensity, body part, equipment) so batch callers filter each combination once.
+    """
+    bmi = profile["bmi"]
+    intensity = get_intensity_level(bmi)
+    preferred_body_part = profile.get("preferred_body_part", "all")
+    equipment_available = profile.get("equipment", ["body weight"])
+    if isinstance(equipment_available, str):
+        equipment_available = [equipment_available]
+
+    key = (intensity, preferred_body_part, tuple(equipment_available))
+    if candidate_cache is not None and key in candidate_cache:
+        arm_positions, leg_positions = candidate_cache[key]
+    else:
+        candidates = catalog.candidate_mask(intensity, preferred_body_part, equipment_available)
+        arm_positions = np.flatnonzero(candidates & catalog.group_masks["arms"])
+        leg_positions = np.flatnonzero(candidates & catalog.group_masks["legs"])
+        if candidate_cache is not None:
+            candidate_cache[key] = (arm_positions, leg_positions)
+
+    if favourite_ids is None:
+        favourite_ids = profile.get("top_exercises")
+    if favourite_ids is None:
+        # profiles from before /api/log-workout kept an embedded history array
+        favourite_ids = top_history_exercises(profile.get("workout_history") or [])
+    favourite_positions, unknown_exercise_ids = catalog.lookup(favourite_ids)
+
+    similar = set()
+    for pos in favourite_positions:
+        similar.update(similar_exercises(catalog.neighbor_ids, pos, 3).tolist())
+
+    def get_weekly_plan(positions, n=7):
+        recommended = positions[np.isin(positions, list(similar))]
+        if len(recommended) > 0:
+            positions = recommended
+
+        return catalog.sample_records(n, positions, rng)
+
+    arm_workouts = get_weekly_plan(arm_positions)
+    leg_workouts = get_weekly_plan(leg_positions)
+
+    weekly_plan = {
+        day: {"arms": arm_workouts[i] if len(arm_workouts) > i else None,
+              "legs": leg_workouts[i] if len(leg_workouts) > i else None}
+        for i, day in enumerate(WEEKDAYS)
+    }
+
+    return {
+        "success": True,
+        "bmi": bmi,
+        "intensity_level": intensity,
+        "weekly_workout_plan": weekly_plan,
+        "unknown_exercise_ids": unknown_exercise_ids
+    }
+
+
+def plan_upsert(email, week, profile_version, plan):
+    """bulk_write operation storing a precomputed plan in workout_plans"""
+    return UpdateOne(
+        {"email": email, "week": week},
+        {"$set": {
+            "plan": plan,
+            "profile_version": profile_version,
+            "generated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
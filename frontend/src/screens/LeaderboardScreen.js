@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { View, Text, StyleSheet, ActivityIndicator, FlatList } from 'react-native';
+import { View, Text, StyleSheet, ActivityIndicator, FlatList, Alert } from 'react-native';
 import { useRoute } from '@react-navigation/native';
 import { LinearGradient } from 'expo-linear-gradient';
 import { Ionicons } from '@expo/vector-icons';
@@ -9,6 +9,7 @@ const API_URL = "https://healthfitnessbackend.onrender.com/api";
 
 const LeaderboardScreen = () => {
   const [leaderboard, setLeaderboard] = useState([]);
+  const [me, setMe] = useState(null);
   const [loading, setLoading] = useState(true);
   const route = useRoute();
   const { challengeName } = route.params;
@@ -18,7 +19,7 @@ const LeaderboardScreen = () => {
       try {
         setLoading(true);
         const token = await AsyncStorage.getItem('authToken');
-        const response = await fetch(`${API_URL}/get-leaderboard/${encodeURIComponent(challengeName)}`, {
+        const response = await fetch(`${API_URL}/get-leaderboard/${encodeURIComponent(challengeName)}?limit=50`, {
           headers: {
             'Authorization': `Bearer ${token}`
           }
@@ -28,6 +29,7 @@ const LeaderboardScreen = () => {
         
         const data = await response.json();
         setLeaderboard(data.leaderboard || []);
+        setMe(data.me || null);
       } catch (error) {
         console.error('Error:', error);
         Alert.alert('Error', 'Failed to load leaderboard');
@@ -57,7 +59,7 @@ const LeaderboardScreen = () => {
             } 
           />
         ) : (
-          <Text style={styles.rankText}>{index + 1}</Text>
+          <Text style={styles.rankText}>{item.rank || index + 1}</Text>
         )}
       </View>
       <Text style={styles.username}>{item.username}</Text>
@@ -79,6 +81,9 @@ const LeaderboardScreen = () => {
     <LinearGradient colors={['#667eea', '#764ba2']} style={styles.container}>
       <View style={styles.header}>
         <Text style={styles.title}>{challengeName} Leaderboard</Text>
+        {me && (
+          <Text style={styles.myRank}>Your rank: #{me.rank} ({me.progress}%)</Text>
+        )}
       </View>
       
       {leaderboard.length > 0 ? (
@@ -117,6 +122,11 @@ const styles = StyleSheet.create({
     fontWeight: 'bold',
     color: 'white',
   },
+  myRank: {
+    marginTop: 6,
+    fontSize: 16,
+    color: 'rgba(255,255,255,0.9)',
+  },
   leaderboardItem: {
     flexDirection: 'row',
     alignItems: 'center',
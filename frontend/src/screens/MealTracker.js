@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   View,
   Text,
@@ -39,25 +39,35 @@ const MealTracker = ({ navigation }) => {
     dinner: ["#5352EC", "#7B7BED"],
   };
 
-  useEffect(() => {
-    const fetchFoodItems = async () => {
-      try {
-        const response = await axios.get("https://healthfitnessbackend.onrender.com/api/get-food-items");
-        if (response.data.food_items.length === 0) {
-          Alert.alert("⚠️ Warning", "No food items found in the database.");
-        }
-        setFoodItems(response.data.food_items.map((food, index) => ({ id: index.toString(), name: food })));
-      } catch (error) {
-        console.error("Error fetching food items:", error);
-        Alert.alert("⚠️ Error", "Failed to load food items.");
-      } finally {
-        setLoading(false);
+  const searchTimer = useRef(null);
+
+  const fetchFoodItems = async (prefix = "") => {
+    try {
+      const response = await axios.get("https://healthfitnessbackend.onrender.com/api/get-food-items", {
+        params: { prefix, limit: 50 },
+      });
+      if (!prefix && response.data.total === 0) {
+        Alert.alert("⚠️ Warning", "No food items found in the database.");
       }
-    };
+      setFoodItems(response.data.food_items.map((food) => ({ id: food, name: food })));
+    } catch (error) {
+      console.error("Error fetching food items:", error);
+      Alert.alert("⚠️ Error", "Failed to load food items.");
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchFoodItems();
+    return () => clearTimeout(searchTimer.current);
   }, []);
 
+  const searchFoodItems = (text) => {
+    clearTimeout(searchTimer.current);
+    searchTimer.current = setTimeout(() => fetchFoodItems(text), 200);
+  };
+
   const handleTabPress = (tab) => {
     setActiveTab(tab);
   };
@@ -65,7 +75,7 @@ const MealTracker = ({ navigation }) => {
   const updateMeal = (mealType, selectedItems) => {
     setMeals((prevMeals) => ({
       ...prevMeals,
-      [mealType]: selectedItems.map((id) => foodItems.find((item) => item.id === id)?.name || ""),
+      [mealType]: selectedItems,
     }));
   };
 
@@ -120,6 +130,14 @@ const MealTracker = ({ navigation }) => {
 
   // Render the active meal content
   const renderActiveMealContent = () => {
+    // keep already selected foods selectable while the search results change
+    const selectableItems = [
+      ...foodItems,
+      ...meals[activeTab]
+        .filter((food) => !foodItems.some((item) => item.name === food))
+        .map((food) => ({ id: food, name: food })),
+    ];
+
     return (
       <Surface style={styles.mealCardContainer}>
         <LinearGradient
@@ -139,12 +157,11 @@ const MealTracker = ({ navigation }) => {
           <View style={styles.multiSelectContainer}>
             <MultiSelect
               hideTags
-              items={foodItems}
+              items={selectableItems}
               uniqueKey="id"
               onSelectedItemsChange={(selectedItems) => updateMeal(activeTab, selectedItems)}
-              selectedItems={meals[activeTab].map(
-                (food) => foodItems.find((item) => item.name === food)?.id || ""
-              )}
+              onChangeInput={searchFoodItems}
+              selectedItems={meals[activeTab]}
               selectText="Search and select food items"
               searchInputPlaceholderText="Type to search foods..."
               tagRemoveIconColor="#FF6B6B"